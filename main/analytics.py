@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+import store
+
+
+class Book:
+    # Returns, covariance and risk of the holdings on the portfolio page, kept across
+    # reruns and updated in place. Adding an asset whose history covers the current
+    # date grid only computes the new covariance row/column (O(T n)); changing a
+    # holding's size is a rank one update of the portfolio variance (O(n)).
+    # Everything is on the common dates of all holdings, like returns.dropna().
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.symbols = []
+        self.prices = pd.DataFrame()
+        self.index = pd.DatetimeIndex([])
+        self.centered = np.zeros((0, 0))  # T x n demeaned daily returns
+        self.mean = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        self.values = np.zeros(0)  # market value per holding
+        self.cov_values = np.zeros(0)  # cov @ values
+        self.variance = 0.0  # values' cov values, daily variance of the book's value
+
+    def _close(self, symbol):
+        return store.load(symbol, columns=["Close"], start=self.start, end=self.end)["Close"]
+
+    def _rebuild(self):
+        returns = self.prices[self.symbols].pct_change().dropna()
+        self.index = returns.index
+        x = returns.to_numpy(dtype=np.float64)
+        self.mean = x.mean(axis=0)
+        self.centered = x - self.mean
+        self.cov = self.centered.T @ self.centered / (len(x) - 1)
+        self.cov_values = self.cov @ self.values
+        self.variance = float(self.values @ self.cov_values)
+
+    def add(self, symbol, value, close=None):
+        close = self._close(symbol) if close is None else close
+        returns = close.pct_change().reindex(self.index)
+        self.prices = pd.concat([self.prices, close.rename(symbol)], axis=1)
+        self.symbols.append(symbol)
+
+        if len(self.symbols) == 1 or returns.isna().any():
+            # first asset, or a shorter history that shrinks the common dates
+            self.values = np.append(self.values, value)
+            self._rebuild()
+            return
+
+        # border the covariance with one row/column against the cached returns
+        x = returns.to_numpy(dtype=np.float64)
+        mean = x.mean()
+        x = x - mean
+        T = len(x)
+        column = self.centered.T @ x / (T - 1)
+        diagonal = x @ x / (T - 1)
+
+        self.cov = np.block([[self.cov, column[:, None]], [column[None, :], np.array([[diagonal]])]])
+        self.centered = np.column_stack([self.centered, x])
+        self.mean = np.append(self.mean, mean)
+        self.variance += 2 * value * (column @ self.values) + value ** 2 * diagonal
+        self.cov_values = np.append(self.cov_values + value * column, column @ self.values + diagonal * value)
+        self.values = np.append(self.values, value)
+
+    def resize(self, symbol, value):
+        i = self.symbols.index(symbol)
+        delta = value - self.values[i]
+        if delta == 0:
+            return
+        self.variance += 2 * delta * self.cov_values[i] + delta ** 2 * self.cov[i, i]
+        self.cov_values += delta * self.cov[:, i]
+        self.values[i] = value
+
+    @property
+    def returns(self):
+        return pd.DataFrame(self.centered + self.mean, index=self.index, columns=self.symbols)
+
+    @property
+    def mean_returns(self):
+        return pd.Series(self.mean, index=self.symbols)
+
+    @property
+    def cov_matrix(self):
+        return pd.DataFrame(self.cov, index=self.symbols, columns=self.symbols)
+
+    def exposures(self):
+        # each holding's share of the book's variance, they sum to one
+        total = self.values.sum()
+        return pd.DataFrame({
+            "value": self.values,
+            "weight": self.values / total,
+            "risk_contribution": self.values * self.cov_values / self.variance,
+        }, index=self.symbols)
+
+    def volatility(self):
+        # daily standard deviation of the book's value, in currency
+        return np.sqrt(max(self.variance, 0.0))
+
+
+def sync(book, symbols, values, start, end):
+    # bring a cached book in line with the holdings, rebuilding only when holdings were
+    # dropped or the date range moved (a new day)
+    symbols = list(symbols)
+    if book is None or book.start != start or book.end != end or book.symbols != symbols[:len(book.symbols)]:
+        book = Book(start, end)
+    for symbol, value in zip(symbols, values):
+        if symbol in book.symbols:
+            book.resize(symbol, float(value))
+        else:
+            book.add(symbol, float(value))
+    return book
@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, root_mean_squared_error
+
+import training
+import pools
+
+FOLDS = 20
+
+# each worker gets the feature matrix once, not once per fold
+_X = None
+_y = None
+_params = None
+
+
+def single_threaded(params):
+    # the pool already uses every core, nested n_jobs=-1 would oversubscribe them
+    return {name: {**p, "n_jobs": 1} for name, p in params.items()}
+
+
+def folds(n_rows, n_folds=FOLDS, min_train=None):
+    # expanding window: train on everything before the block, test on the block
+    min_train = min_train or n_rows // 2
+    edges = np.linspace(min_train, n_rows, n_folds + 1).astype(int)
+    return [(i, edges[i], edges[i + 1]) for i in range(n_folds)]
+
+
+def _init(X, y, params):
+    global _X, _y, _params
+    _X, _y, _params = X, y, params
+
+
+def _run_fold(fold):
+    i, train_end, test_end = fold
+    bundle = training.fit(_X[:train_end], _y[:train_end], _params)
+    X_test = bundle["scaler"].transform(_X[train_end:test_end])
+    y_test = _y[train_end:test_end]
+
+    rows = []
+    for name in ("xgb", "rf", "knn"):
+        pred = bundle[name].predict(X_test)
+        rows.append({
+            "fold": i,
+            "model": name,
+            "rmse": root_mean_squared_error(y_test, pred),
+            "mae": mean_absolute_error(y_test, pred),
+            "n_test": len(y_test),
+        })
+    return rows
+
+
+def run(data, n_folds=FOLDS, params=training.PARAMS, workers=None):
+    # data already has the features, they are causal so one pass serves every fold
+    X = data[training.FEATURES].to_numpy()
+    y = data['Return'].to_numpy()
+    plan = folds(len(data), n_folds)
+    workers = workers or os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=pools.context(), initializer=_init, initargs=(X, y, single_threaded(params))) as pool:
+        results = list(pool.map(_run_fold, plan))
+
+    per_fold = pd.DataFrame([row for rows in results for row in rows])
+    starts = {i: data.index[train_end] for i, train_end, _ in plan}
+    per_fold.insert(1, "test_start", per_fold["fold"].map(starts))
+
+    # pooled rmse weighs folds by their size, the mean/std show how stable the model is over time
+    per_fold["sq_err"] = per_fold["rmse"] ** 2 * per_fold["n_test"]
+    summary = per_fold.groupby("model").agg(
+        rmse_mean=("rmse", "mean"),
+        rmse_std=("rmse", "std"),
+        mae_mean=("mae", "mean"),
+        sq_err=("sq_err", "sum"),
+        n_test=("n_test", "sum"),
+    )
+    summary["rmse_pooled"] = np.sqrt(summary.pop("sq_err") / summary.pop("n_test"))
+    return per_fold.drop(columns="sq_err"), summary
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, root_mean_squared_error
+
+import backtest
+import registry
+import sp500
+import store
+import training
+import tuning
+from paths import data_path
+
+
+# Headless training for the whole S&P 500, e.g. from cron:
+#   python main/batch_train.py --workers 8 --budget 360
+# Every finished symbol is appended to a checkpoint file, so rerunning with the
+# same --run-id picks up where an interrupted or timed out run stopped.
+
+
+def train_symbol(symbol):
+    # same slice as the Models page so the registry key matches and the page reuses the fit
+    bars = store.load(symbol, start=store.DEFAULT_START, end=date.today())
+    data = training.add_features(bars)
+    if len(data) < 100:
+        raise ValueError(f"only {len(data)} usable rows")
+
+    x_train, x_test, y_train, y_test = training.split(data)
+    # per ticker tuned configuration when there is one, same as the page
+    params = backtest.single_threaded(tuning.best_params(symbol))
+    key = registry.key(symbol, bars, params)
+    bundle = registry.load(key)
+    if bundle is None:
+        bundle = training.fit(x_train, y_train, params)
+        registry.save(key, bundle)
+
+    X_test_scaled = bundle["scaler"].transform(x_test)
+    metrics = {"symbol": symbol, "key": key, "last_bar": str(data.index[-1].date())}
+    for name in ("xgb", "rf", "knn"):
+        pred = bundle[name].predict(X_test_scaled)
+        metrics[f"{name}_rmse"] = root_mean_squared_error(y_test, pred)
+        metrics[f"{name}_mae"] = mean_absolute_error(y_test, pred)
+    return metrics
+
+
+def _safe_train(symbol):
+    try:
+        return train_symbol(symbol)
+    except Exception as e:
+        return {"symbol": symbol, "error": f"{type(e).__name__}: {e}"}
+
+
+def _read_checkpoint(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # the next run writes the symbol again
+        done[row["symbol"]] = row
+
+    # the next append has to start on a fresh line: a half written last row (the run
+    # was killed mid write) is cut off, a complete one missing its newline gets one
+    if lines and not lines[-1].endswith(b"\n"):
+        try:
+            json.loads(lines[-1])
+        except json.JSONDecodeError:
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) - len(lines[-1]))
+        else:
+            with open(path, "ab") as f:
+                f.write(b"\n")
+    return done
+
+
+def run(symbols, run_id, workers, budget_minutes=None, retry_failed=False):
+    checkpoint = data_path("batch", run_id, "checkpoint.jsonl")
+    done = _read_checkpoint(checkpoint)
+    todo = [s for s in symbols if s not in done or (retry_failed and "error" in done[s])]
+    print(f"{len(done)} symbols already in checkpoint, {len(todo)} to train")
+
+    deadline = time.time() + budget_minutes * 60 if budget_minutes else None
+    pending = set()
+    trained = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(checkpoint, "a") as out:
+        queue = iter(todo)
+        while True:
+            # keep at most 2 x workers symbols in flight, stop feeding once out of time
+            while len(pending) < 2 * workers and (deadline is None or time.time() < deadline):
+                symbol = next(queue, None)
+                if symbol is None:
+                    break
+                pending.add(pool.submit(_safe_train, symbol))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                row = future.result()
+                done[row["symbol"]] = row
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                trained += 1
+                status = row.get("error", f"xgb rmse {row.get('xgb_rmse', 0):.6f}")
+                print(f"[{trained}/{len(todo)}] {row['symbol']}: {status}")
+
+    metrics = pd.DataFrame(list(done.values()))
+    metrics.to_csv(data_path("batch", run_id, "metrics.csv"), index=False)
+    left = len([s for s in symbols if s not in done])
+    if left:
+        print(f"time budget reached, {left} symbols left, rerun with --run-id {run_id} to resume")
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Models page feature set and models for every S&P 500 symbol.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parallel training processes")
+    parser.add_argument("--budget", type=float, default=None, help="stop scheduling new symbols after this many minutes")
+    parser.add_argument("--run-id", default=date.today().isoformat(), help="checkpoint name, reuse it to resume a run")
+    parser.add_argument("--symbols", nargs="*", help="train only these symbols instead of the whole index")
+    parser.add_argument("--retry-failed", action="store_true", help="train symbols that errored in the checkpoint again")
+    args = parser.parse_args()
+
+    symbols = args.symbols or sp500.get_sp500()
+    run(symbols, args.run_id, args.workers, args.budget, args.retry_failed)
+
+
+if __name__ == "__main__":
+    main()
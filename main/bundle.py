@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import yfinance as yf
+
+import metadata
+
+# shared by every session, a page load puts all of its requests in flight at once
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="bundle")
+
+# price history is kept this long per (symbol, range); a rerun of the page, e.g. after
+# a date change, only requests the ranges it doesn't have yet
+HISTORY_TTL_SECONDS = 15 * 60
+MAX_HISTORIES = 64
+
+_histories = OrderedDict()
+_lock = threading.Lock()
+
+
+def _history(symbol, **kwargs):
+    # the future of one history call, shared with every other page load asking for the
+    # same range while it's in flight or fresh; failed calls aren't kept
+    key = (symbol, tuple(sorted(kwargs.items())))
+    now = time.time()
+    with _lock:
+        entry = _histories.get(key)
+        if entry is not None:
+            submitted_at, future = entry
+            failed = future.done() and future.exception() is not None
+            if now - submitted_at <= HISTORY_TTL_SECONDS and not failed:
+                _histories.move_to_end(key)
+                return future
+        # a fresh Ticker, yfinance memoizes inside the object
+        future = _pool.submit(lambda: yf.Ticker(symbol).history(**kwargs))
+        _histories[key] = (now, future)
+        while len(_histories) > MAX_HISTORIES:
+            _histories.popitem(last=False)
+    return future
+
+
+class Bundle:
+    # Everything the ticker page needs for one symbol, requested concurrently. The
+    # page waits on the pieces in the order they arrive, so its latency is the slowest
+    # single call instead of the sum of all of them.
+    def __init__(self, symbol, start, end):
+        self.symbol = symbol
+        # history through the cache above, metadata through its own
+        calls = {
+            "income": lambda: metadata.get(symbol, "quarterly_income_stmt"),
+            "info": lambda: metadata.info(symbol),
+            "holders": lambda: metadata.get(symbol, "major_holders"),
+        }
+        self.futures = {
+            "history_1y": _history(symbol, period="1y"),
+            **{name: _pool.submit(call) for name, call in calls.items()},
+            "history": _history(symbol, start=start, end=end),
+        }
+        self._names = {future: name for name, future in self.futures.items()}
+
+    def result(self, name, timeout=None):
+        return self.futures[name].result(timeout)
+
+    def as_completed(self, timeout=None):
+        # piece names in arrival order
+        for future in as_completed(self.futures.values(), timeout):
+            yield self._names[future]
+
+
+def load(symbol, start, end):
+    return Bundle(symbol, start, end)
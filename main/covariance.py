@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+ESTIMATORS = ("sample", "ledoit_wolf", "ewma")
+EWMA_LAMBDA = 0.94  # RiskMetrics daily decay
+
+# asset sets whose running moments are kept, and finished estimates
+MAX_STATES = 16
+MAX_RESULTS = 64
+
+
+class Moments:
+    # Running sums over daily return rows, enough for every estimator:
+    #   sample cov      from T, sum x and sum xx'
+    #   Ledoit-Wolf     additionally sum |x|^2, sum |x|^4 and sum |x|^2 x, which give
+    #                   sum_t |x_t - mean|^4 without keeping the rows
+    #   EWMA            decayed sum of xx' (zero mean, RiskMetrics) and its total weight
+    # New rows only add to the sums, a day of returns costs O(n^2) instead of O(T n^2).
+    def __init__(self, n, decay=EWMA_LAMBDA):
+        self.decay = decay
+        self.count = 0
+        self.total = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.sq = 0.0
+        self.quad = 0.0
+        self.sq_x = np.zeros(n)
+        self.ewma = np.zeros((n, n))
+        self.ewma_weight = 0.0
+        self.last = None
+
+    def update(self, rows, last=None):
+        x = np.asarray(rows, dtype=np.float64)
+        if not len(x):
+            return
+        norms = (x ** 2).sum(axis=1)
+        self.count += len(x)
+        self.total += x.sum(axis=0)
+        self.cross += x.T @ x
+        self.sq += norms.sum()
+        self.quad += (norms ** 2).sum()
+        self.sq_x += norms @ x
+
+        # older rows decay by lambda per newer row, the whole block is one weighted product
+        k = len(x)
+        weights = (1 - self.decay) * self.decay ** np.arange(k - 1, -1, -1)
+        self.ewma = self.decay ** k * self.ewma + (x * weights[:, None]).T @ x
+        self.ewma_weight = self.decay ** k * self.ewma_weight + weights.sum()
+        self.last = last
+
+    def mean(self):
+        return self.total / self.count
+
+    def sample(self, ddof=1):
+        mean = self.mean()
+        return (self.cross - self.count * np.outer(mean, mean)) / (self.count - ddof)
+
+    def ledoit_wolf(self):
+        # same estimator as sklearn.covariance.ledoit_wolf, shrinking towards a scaled identity
+        T, n = self.count, len(self.total)
+        mean = self.mean()
+        emp = self.sample(ddof=0)
+        mu = np.trace(emp) / n
+
+        # sum_t |y_t|^4 with y_t = x_t - mean, expanded into the running sums
+        c = mean @ mean
+        b2 = mean @ self.cross @ mean
+        ab = mean @ self.sq_x
+        b = mean @ self.total
+        fourth = self.quad + 4 * b2 + T * c ** 2 - 4 * ab + 2 * c * self.sq - 4 * c * b
+
+        beta = (fourth / T - (emp ** 2).sum()) / (n * T)
+        delta = ((emp - mu * np.eye(n)) ** 2).sum() / n
+        shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+        return (1 - shrinkage) * emp + shrinkage * mu * np.eye(n), shrinkage
+
+    def ewma_cov(self):
+        return self.ewma / self.ewma_weight
+
+
+_states = OrderedDict()
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def _state(returns):
+    # moments for this asset set and start date, advanced by the rows it hasn't seen
+    key = (tuple(returns.columns), returns.index[0])
+    state = _states.get(key)
+    if state is not None and state.last in returns.index:
+        _states.move_to_end(key)
+        fresh = returns[returns.index > state.last]
+    else:
+        state = _states[key] = Moments(returns.shape[1])
+        fresh = returns
+        while len(_states) > MAX_STATES:
+            _states.popitem(last=False)
+    if len(fresh):
+        state.update(fresh.to_numpy(), fresh.index[-1])
+    return state
+
+
+def estimate(returns, estimator="sample"):
+    # covariance of daily returns as a labelled frame, cached per (assets, estimator, as-of)
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"estimator must be one of {ESTIMATORS}")
+    returns = returns.dropna()
+    key = (tuple(returns.columns), returns.index[0], returns.index[-1], len(returns), estimator)
+
+    with _lock:
+        cached = _results.get(key)
+        if cached is not None:
+            _results.move_to_end(key)
+            return cached
+
+        state = _state(returns)
+        if estimator == "sample":
+            values = state.sample()
+        elif estimator == "ledoit_wolf":
+            values, _ = state.ledoit_wolf()
+        else:
+            values = state.ewma_cov()
+
+        cov = pd.DataFrame(values, index=returns.columns, columns=returns.columns)
+        _results[key] = cov
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+        return cov
@@ -0,0 +1,152 @@
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+MA_SHORT = 10
+MA_LONG = 50
+VOL_WINDOW = 20
+
+# symbols whose rolling state is kept in memory
+MAX_SYMBOLS = 32
+
+
+def compute(data):
+    # bulk vectorized path, used for the initial backfill of a symbol
+    data = data.copy()
+    data['Return'] = data['Close'].pct_change()  # target
+    data['MA10'] = data['Close'].rolling(MA_SHORT).mean()
+    data['MA50'] = data['Close'].rolling(MA_LONG).mean()
+    data['Volatility'] = data['Return'].rolling(VOL_WINDOW).std()
+    return data.dropna()
+
+
+class RollingState:
+    # Running sums for the moving averages and a sliding Welford mean/M2 for the
+    # return volatility, so one new bar updates every feature in O(1).
+    def __init__(self):
+        self.closes = deque(maxlen=MA_LONG)
+        self.sum_short = 0.0
+        self.sum_long = 0.0
+        self.returns = deque(maxlen=VOL_WINDOW)
+        self.ret_mean = 0.0
+        self.ret_m2 = 0.0
+
+    @classmethod
+    def from_history(cls, closes):
+        state = cls()
+        closes = np.asarray(closes, dtype=np.float64)[-(MA_LONG + 1):]
+        if len(closes):
+            # seed straight from the tail of the history instead of replaying it
+            state.closes.extend(closes[-MA_LONG:])
+            state.sum_short = float(closes[-MA_SHORT:].sum())
+            state.sum_long = float(closes[-MA_LONG:].sum())
+            returns = closes[1:] / closes[:-1] - 1
+            state.returns.extend(returns[-VOL_WINDOW:])
+            if len(state.returns):
+                window = np.array(state.returns)
+                state.ret_mean = float(window.mean())
+                state.ret_m2 = float(((window - state.ret_mean) ** 2).sum())
+        return state
+
+    def _push_return(self, ret):
+        if len(self.returns) == VOL_WINDOW:
+            old = self.returns[0]
+            self.returns.append(ret)
+            new_mean = self.ret_mean + (ret - old) / VOL_WINDOW
+            self.ret_m2 += (ret - old) * (ret - new_mean + old - self.ret_mean)
+            self.ret_mean = new_mean
+        else:
+            self.returns.append(ret)
+            delta = ret - self.ret_mean
+            self.ret_mean += delta / len(self.returns)
+            self.ret_m2 += delta * (ret - self.ret_mean)
+
+    def update(self, close):
+        ret = close / self.closes[-1] - 1 if self.closes else math.nan
+
+        if len(self.closes) >= MA_SHORT:
+            self.sum_short -= self.closes[-MA_SHORT]
+        if len(self.closes) == MA_LONG:
+            self.sum_long -= self.closes[0]
+        self.closes.append(close)
+        self.sum_short += close
+        self.sum_long += close
+
+        if not math.isnan(ret):
+            self._push_return(ret)
+        return ret
+
+    @property
+    def ma10(self):
+        return self.sum_short / MA_SHORT if len(self.closes) >= MA_SHORT else math.nan
+
+    @property
+    def ma50(self):
+        return self.sum_long / MA_LONG if len(self.closes) == MA_LONG else math.nan
+
+    @property
+    def volatility(self):
+        if len(self.returns) < VOL_WINDOW:
+            return math.nan
+        return math.sqrt(max(self.ret_m2, 0.0) / (VOL_WINDOW - 1))
+
+
+class SymbolFeatures:
+    def __init__(self, bars):
+        self.frame = compute(bars)
+        self.first_bar = bars.index[0] if len(bars) else None
+        self.last_bar = bars.index[-1] if len(bars) else None
+        self.state = RollingState.from_history(bars['Close'].to_numpy())
+
+    def covers(self, bars):
+        # same history we were built from, possibly with newer bars appended
+        return (
+            self.last_bar is not None
+            and len(bars) > 0
+            and bars.index[0] == self.first_bar
+            and self.last_bar in bars.index
+        )
+
+    def extend(self, bars):
+        # only the bars after the last one we've seen, each one is an O(1) update
+        rows = []
+        for ts, bar in bars.iterrows():
+            close = float(bar['Close'])
+            ret = self.state.update(close)
+            rows.append({
+                **{col: bar[col] for col in bars.columns},
+                'Return': ret,
+                'MA10': self.state.ma10,
+                'MA50': self.state.ma50,
+                'Volatility': self.state.volatility,
+            })
+            self.last_bar = ts
+        if rows:
+            fresh = pd.DataFrame(rows, index=bars.index).dropna()
+            self.frame = pd.concat([self.frame, fresh]) if len(self.frame) else fresh
+
+    def latest(self):
+        return {'MA10': self.state.ma10, 'MA50': self.state.ma50, 'Volatility': self.state.volatility}
+
+
+_symbols = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(symbol, bars):
+    # reuse the rolling state of a symbol when `bars` only adds rows to what it has seen
+    with _lock:
+        features = _symbols.get(symbol)
+        if features is not None:
+            _symbols.move_to_end(symbol)
+
+        if features is not None and features.covers(bars):
+            features.extend(bars[bars.index > features.last_bar])
+        else:
+            features = _symbols[symbol] = SymbolFeatures(bars)
+            while len(_symbols) > MAX_SYMBOLS:
+                _symbols.popitem(last=False)
+        return features
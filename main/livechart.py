@@ -0,0 +1,40 @@
+# number of points kept on the live chart
+WINDOW = 50
+
+
+class LiveChart:
+    # Keeps one chart element alive across refreshes and only sends the new
+    # points to the browser. After `window` appends it redraws from the last
+    # `window` points, so the client never holds more than twice the window.
+    # The poller replaces the still forming last bar on every poll, so only completed
+    # bars are charted (the forming price is on the price card); the chart is redrawn
+    # only when a completed bar we already sent has changed.
+    def __init__(self, slot, window=WINDOW, **chart_kwargs):
+        self.slot = slot
+        self.window = window
+        self.chart_kwargs = chart_kwargs
+        self._chart = None
+        self._last = None
+        self._last_row = None
+        self._appended = 0
+
+    def update(self, prices):
+        completed = prices.iloc[:-1]
+        if completed.empty:
+            return
+
+        revised = self._last is not None and (
+            self._last not in completed.index or not completed.loc[[self._last]].equals(self._last_row)
+        )
+        if self._chart is None or self._appended >= self.window or revised:
+            self._chart = self.slot.line_chart(completed.tail(self.window), **self.chart_kwargs)
+            self._appended = 0
+        else:
+            new = completed[completed.index > self._last]
+            if new.empty:
+                return
+            self._chart.add_rows(new)
+            self._appended += len(new)
+
+        self._last = completed.index[-1]
+        self._last_row = completed.iloc[[-1]]
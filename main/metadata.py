@@ -0,0 +1,118 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import yfinance as yf
+
+from paths import data_path
+
+# how long each field counts as fresh; statements and holders change quarterly,
+# quote fields inside `info` by the minute
+TTL_SECONDS = {
+    "info": 5 * 60,
+    "recommendations": 24 * 60 * 60,
+    "quarterly_income_stmt": 7 * 24 * 60 * 60,
+    "major_holders": 7 * 24 * 60 * 60,
+}
+
+FETCHERS = {
+    "info": lambda t: t.info,
+    "recommendations": lambda t: t.get_recommendations(),
+    "quarterly_income_stmt": lambda t: t.quarterly_income_stmt,
+    "major_holders": lambda t: t.get_major_holders(),
+}
+
+# (symbol, field) entries kept in memory in front of the disk copies
+MAX_ENTRIES = 256
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_refreshing = set()
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="metadata-refresh")
+
+
+def _path(symbol, field):
+    return data_path("metadata", symbol, f"{field}.pkl")
+
+
+def _remember(key, entry):
+    with _lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _read(symbol, field):
+    path = _path(symbol, field)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None  # half written by an older version or corrupt, refetch
+
+
+def _write(symbol, field, entry):
+    path = _path(symbol, field)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(entry, f)
+    os.replace(tmp, path)
+
+
+def fetch(symbol, field):
+    # a fresh Ticker each time: yfinance memoizes inside the object, while the HTTP
+    # session and cookies are shared process wide anyway
+    value = FETCHERS[field](yf.Ticker(symbol))
+    entry = (time.time(), value)
+    _write(symbol, field, entry)
+    _remember((symbol, field), entry)
+    return value
+
+
+def _refresh(symbol, field):
+    try:
+        fetch(symbol, field)
+    except Exception:
+        pass  # offline or rate limited, keep serving the last good value
+    finally:
+        with _lock:
+            _refreshing.discard((symbol, field))
+
+
+def _refresh_in_background(symbol, field):
+    with _lock:
+        if (symbol, field) in _refreshing:
+            return
+        _refreshing.add((symbol, field))
+    _pool.submit(_refresh, symbol, field)
+
+
+def get(symbol, field):
+    # memory, then disk, then yahoo. A stale value is returned right away and refreshed
+    # in the background (stale-while-revalidate); only a value never seen before blocks.
+    key = (symbol, field)
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+
+    if entry is None:
+        entry = _read(symbol, field)
+        if entry is None:
+            return fetch(symbol, field)
+        _remember(key, entry)
+
+    fetched_at, value = entry
+    if time.time() - fetched_at > TTL_SECONDS[field]:
+        _refresh_in_background(symbol, field)
+    return value
+
+
+def info(symbol):
+    return get(symbol, "info")
@@ -0,0 +1,221 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import pools
+
+N_PATHS = 100_000
+DAYS = 252  # 1 year
+CHUNK = 10_000
+BANDS = (5, 50, 95)
+
+# per day histogram of log portfolio value, wide enough for +-8 sigma
+BINS = 4000
+SIGMAS = 8.0
+
+
+def cholesky(cov):
+    # factorized once per simulation; a sample covariance can be slightly
+    # indefinite, in that case fall back to a clipped eigen decomposition
+    cov = np.asarray(cov, dtype=np.float64)
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def asset_returns(mean, chol, size, rng, dtype=np.float64):
+    # correlated daily returns for every asset, one row per draw
+    z = rng.standard_normal((size, len(mean)), dtype=dtype)
+    return np.asarray(mean, dtype=dtype) + z @ chol.T.astype(dtype)
+
+
+def portfolio_moments(mean, cov, weights):
+    # with fixed weights the portfolio return w.r, r ~ N(mu, LL'), is N(w.mu, |L'w|^2),
+    # so each path/day needs one normal draw instead of one per asset
+    weights = np.asarray(weights, dtype=np.float64)
+    chol = cholesky(cov)
+    return float(weights @ np.asarray(mean, dtype=np.float64)), float(np.linalg.norm(chol.T @ weights))
+
+
+def _grid(mu, sigma, days):
+    t = np.arange(1, days + 1)
+    drift = t * (mu - sigma ** 2 / 2)
+    spread = SIGMAS * max(sigma, 1e-12) * np.sqrt(t)
+    lo = drift - spread
+    width = 2 * spread / BINS
+    return lo, width
+
+
+def _run_chunk(task):
+    mu, sigma, days, size, seed, grid, dtype = task
+    lo, width = grid
+    rng = np.random.default_rng(seed)
+
+    returns = mu + sigma * rng.standard_normal((size, days), dtype=dtype)
+    log_value = np.cumsum(np.log1p(returns), axis=1, dtype=np.float64)
+
+    # bin every path/day into that day's histogram, one bincount for the whole chunk
+    bins = np.clip(((log_value - lo) / width).astype(np.int64), 0, BINS - 1)
+    flat = bins + np.arange(days) * BINS
+    counts = np.bincount(flat.ravel(), minlength=days * BINS).reshape(days, BINS)
+
+    terminal = np.exp(log_value[:, -1])
+    return counts, terminal.sum(), (terminal ** 2).sum()
+
+
+def _quantiles(counts, grid, qs):
+    lo, width = grid
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1:]
+    out = {}
+    for q in qs:
+        idx = np.argmax(cumulative >= total * q / 100, axis=1)
+        out[f"p{q}"] = np.exp(lo + (idx + 0.5) * width)
+    return pd.DataFrame(out, index=pd.RangeIndex(1, len(lo) + 1, name="day"))
+
+
+def chunk_seeds(seed, n_chunks):
+    # independent streams per chunk: the same seed gives the same answer for any worker count
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+
+def simulate(mean, cov, weights, n_paths=N_PATHS, days=DAYS, chunk=CHUNK, seed=None,
+             dtype=np.float32, workers=1, bands=BANDS):
+    mu, sigma = portfolio_moments(mean, cov, weights)
+    grid = _grid(mu, sigma, days)
+
+    n_chunks = math.ceil(n_paths / chunk)
+    sizes = [min(chunk, n_paths - i * chunk) for i in range(n_chunks)]
+    tasks = [(mu, sigma, days, size, s, grid, dtype) for size, s in zip(sizes, chunk_seeds(seed, n_chunks))]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pools.context()) as pool:
+            results = list(pool.map(_run_chunk, tasks))
+    else:
+        results = [_run_chunk(task) for task in tasks]
+
+    # only histograms and running sums are kept, memory doesn't grow with n_paths
+    counts = sum(r[0] for r in results)
+    total = sum(r[1] for r in results)
+    total_sq = sum(r[2] for r in results)
+    mean_terminal = total / n_paths
+
+    return {
+        "bands": _quantiles(counts, grid, bands),
+        "terminal_mean": mean_terminal,
+        "terminal_std": math.sqrt(max(total_sq / n_paths - mean_terminal ** 2, 0.0)),
+        "n_paths": n_paths,
+        "daily_mean": mu,
+        "daily_vol": sigma,
+    }
+
+
+# variance reduced estimates of terminal value statistics, reported with a standard
+# error from independent replicates so the caller can stop at a target precision
+METHODS = ("plain", "antithetic", "sobol")
+# antithetic pairs cancel the control exactly and a Sobol replicate nearly so, it only
+# carries information for plain sampling
+CONTROL_METHODS = ("plain",)
+BATCH = 4096
+MIN_REPLICATES = 16
+CONFIDENCE = 0.95
+MAX_PATHS = 1_000_000
+
+
+def _normals(method, batch, days, rng):
+    if method == "antithetic":
+        half = rng.standard_normal((batch // 2, days))
+        return np.vstack([half, -half])
+    if method == "sobol":
+        from scipy.stats import norm, qmc
+
+        # a fresh scramble per replicate keeps replicates independent (randomized QMC)
+        points = qmc.Sobol(d=days, scramble=True, seed=rng).random_base2(int(math.log2(batch)))
+        return norm.ppf(np.clip(points, 1e-12, 1 - 1e-12))
+    return rng.standard_normal((batch, days))
+
+
+def _replicate(mu, sigma, days, batch, method, rng, level):
+    z = _normals(method, batch, days, rng)
+    returns = mu + sigma * z
+    terminal = np.exp(np.log1p(returns).sum(axis=1))
+
+    q = np.percentile(terminal, [100 - level, 50, level])
+    tail = terminal[terminal <= q[0]]
+    stats = {
+        "terminal_mean": terminal.mean(),
+        f"var_{level}": 1 - q[0],
+        f"cvar_{level}": 1 - tail.mean(),
+        "terminal_p50": q[1],
+        f"terminal_p{level}": q[2],
+    }
+    # control: the path's mean daily return, whose expectation is the analytic portfolio mean
+    control = returns.mean() - mu
+    return stats, control
+
+
+def _combine(rows, controls, use_control):
+    from scipy.stats import t
+
+    frame = pd.DataFrame(rows)
+    n = len(frame)
+    c = np.asarray(controls)
+    use_control = use_control and c.var() > 1e-30
+    # few replicates: the interval takes a t quantile, one more degree of freedom goes
+    # to the control's beta, which is estimated from the same replicates
+    dof = n - 2 if use_control else n - 1
+    quantile = t.ppf((1 + CONFIDENCE) / 2, dof)
+    out = {}
+    for name in frame.columns:
+        y = frame[name].to_numpy()
+        if use_control:
+            beta = np.cov(y, c)[0, 1] / c.var(ddof=1)
+            adjusted = y - beta * c
+        else:
+            adjusted = y
+        se = math.sqrt(((adjusted - adjusted.mean()) ** 2).sum() / dof / n)
+        out[name] = (adjusted.mean(), se, quantile * se)
+    return out
+
+
+def estimate(mean, cov, weights, days=DAYS, method="antithetic", control_variate=True,
+             target_se=None, stat=None, level=95, batch=BATCH, max_paths=MAX_PATHS, seed=None):
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    # the statistic the stopping rule watches, named after `level` like the columns
+    stat = stat or f"var_{level}"
+    stats = ("terminal_mean", f"var_{level}", f"cvar_{level}", "terminal_p50", f"terminal_p{level}")
+    if stat not in stats:
+        raise ValueError(f"stat must be one of {stats}")
+    if method == "sobol":
+        batch = 2 ** math.ceil(math.log2(batch))
+
+    control_variate = control_variate and method in CONTROL_METHODS
+
+    mu, sigma = portfolio_moments(mean, cov, weights)
+    seeds = np.random.SeedSequence(seed)
+    rows, controls = [], []
+
+    while True:
+        stats, control = _replicate(mu, sigma, days, batch, method, np.random.default_rng(seeds.spawn(1)[0]), level)
+        rows.append(stats)
+        controls.append(control)
+
+        n_paths = len(rows) * batch
+        if len(rows) >= MIN_REPLICATES:
+            result = _combine(rows, controls, control_variate)
+            if target_se is None or result[stat][1] <= target_se or n_paths >= max_paths:
+                break
+
+    return {
+        "estimates": pd.DataFrame(result, index=["estimate", "std_error", f"ci_{CONFIDENCE * 100:.0f}"]).T,
+        "n_paths": n_paths,
+        "replicates": len(rows),
+        "method": method,
+        "control_variate": control_variate,
+        "analytic_mean": (1 + mu) ** days,
+    }
@@ -0,0 +1,242 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import minimize
+
+import pools
+import qp
+
+TRADING_DAYS = 252
+FRONTIER_POINTS = 50
+
+# annualized variances are ~1e-2, scipy's default ftol of 1e-6 stops too early
+FTOL = 1e-10
+
+
+class MeanVariance:
+    # Long-only, fully invested mean-variance problems on annualized inputs.
+    # The covariance is annualized once here and every objective comes with its
+    # analytic gradient, so SLSQP never has to finite-difference.
+    def __init__(self, mean_returns, cov_matrix, bounds=(0, 1)):
+        self.mu = np.asarray(mean_returns, dtype=np.float64) * TRADING_DAYS
+        self.cov = np.asarray(cov_matrix, dtype=np.float64) * TRADING_DAYS
+        self.n = len(self.mu)
+        self.bounds = [bounds] * self.n
+        self.long_only = tuple(bounds) == (0, 1)
+        self.budget = {"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones_like(w)}
+
+    def performance(self, weights):
+        ret = weights @ self.mu  # annualized return
+        vol = np.sqrt(weights @ self.cov @ weights)  # annualized volatility
+        return ret, vol, ret / vol
+
+    def neg_sharpe(self, weights):
+        cov_w = self.cov @ weights
+        ret = weights @ self.mu
+        vol = np.sqrt(weights @ cov_w)
+        # d(ret/vol) = mu/vol - ret * cov w / vol^3
+        grad = self.mu / vol - ret * cov_w / vol ** 3
+        return -ret / vol, -grad
+
+    def variance(self, weights):
+        cov_w = self.cov @ weights
+        return weights @ cov_w, 2 * cov_w
+
+    def _solve(self, objective, x0=None, constraints=()):
+        x0 = np.full(self.n, 1 / self.n) if x0 is None else x0
+        result = minimize(objective, x0, jac=True, method="SLSQP", bounds=self.bounds,
+                          constraints=[self.budget, *constraints], options={"ftol": FTOL, "maxiter": 500})
+        return result.x
+
+    def max_sharpe(self, x0=None):
+        if not self.long_only or self.mu.max() <= 0:
+            return self._solve(self.neg_sharpe, x0)
+        # long only, w = y / sum(y) turns the ratio into the convex QP
+        # min y'Sy s.t. mu'y = 1, y >= 0, which SLSQP solves in far fewer iterations
+        y0 = np.full(self.n, 1 / self.n) if x0 is None else np.asarray(x0, dtype=np.float64)
+        if y0 @ self.mu <= 0:
+            y0 = np.clip(self.mu, 0, None)
+        result = minimize(self.variance, y0 / (y0 @ self.mu), jac=True, method="SLSQP",
+                          bounds=[(0, None)] * self.n,
+                          constraints=[{"type": "eq", "fun": lambda y: y @ self.mu - 1, "jac": lambda y: self.mu}],
+                          options={"ftol": FTOL, "maxiter": 500})
+        return result.x / result.x.sum()
+
+    def min_variance(self, x0=None):
+        return self._solve(self.variance, x0)
+
+    def target_return(self, target, x0=None):
+        constraint = {"type": "eq", "fun": lambda w: w @ self.mu - target, "jac": lambda w: self.mu}
+        return self._solve(self.variance, x0, [constraint])
+
+    def frontier_targets(self, n_points=FRONTIER_POINTS):
+        # from the minimum variance portfolio up to the best single asset
+        low = self.min_variance() @ self.mu
+        return np.linspace(low, self.mu.max(), n_points)
+
+    def trace(self, targets, x0=None):
+        # each solve starts from the previous point's weights, neighbours on the frontier are close
+        weights = []
+        for target in targets:
+            x0 = self.target_return(target, x0)
+            weights.append(x0)
+        return np.array(weights)
+
+    def frontier(self, n_points=FRONTIER_POINTS, workers=1):
+        targets = self.frontier_targets(n_points)
+        if workers > 1:
+            # contiguous segments per worker, warm starts still apply inside a segment
+            segments = np.array_split(targets, workers)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=pools.context()) as pool:
+                parts = pool.map(_trace_segment, [(self.mu, self.cov, seg) for seg in segments])
+                weights = np.vstack(list(parts))
+        else:
+            weights = self.trace(targets)
+
+        rets = weights @ self.mu
+        vols = np.sqrt(np.einsum("ij,jk,ik->i", weights, self.cov, weights))
+        return pd.DataFrame({"return": rets, "volatility": vols, "sharpe": rets / vols}), weights
+
+
+def _trace_segment(task):
+    mu, cov, targets = task
+    return MeanVariance(mu / TRADING_DAYS, cov / TRADING_DAYS).trace(targets)
+
+
+class Constrained:
+    # Mean-variance as a quadratic program for large universes, solved with qp.solve.
+    # Supports per-asset caps, sector caps and an L1 turnover limit against current
+    # holdings. Variables are x = [y, k, t]: weights are w = y / k with k = 1 except for
+    # max Sharpe, and t >= |y - k * current| exists only when a turnover limit is set.
+    # Every constraint is homogeneous in (y, k), so max Sharpe stays a QP
+    # (minimize y'Sy subject to mu'y = 1).
+    def __init__(self, mean_returns, cov_matrix, caps=1.0, sectors=None, sector_caps=None,
+                 current=None, turnover=None):
+        self.mu = np.asarray(mean_returns, dtype=np.float64) * TRADING_DAYS
+        self.cov = np.asarray(cov_matrix, dtype=np.float64) * TRADING_DAYS
+        self.n = n = len(self.mu)
+        self.caps = np.broadcast_to(np.asarray(caps, dtype=np.float64), (n,))
+        use_turnover = turnover is not None and current is not None
+        self.size = n + 1 + (n if use_turnover else 0)
+
+        eye = sp.identity(n, format="csr")
+        pad = sp.csr_matrix((n, self.size - n - 1))
+        blocks = []
+
+        def add(block, lo, hi):
+            block = sp.csr_matrix(block)
+            blocks.append((block, np.broadcast_to(lo, block.shape[0]), np.broadcast_to(hi, block.shape[0])))
+
+        def row(y=0.0, k=0.0, t=0.0):
+            r = np.zeros(self.size)
+            r[:n] = y
+            r[n] = k
+            r[n + 1:] = t
+            return r[None, :]
+
+        add(row(y=1.0, k=-1.0), 0.0, 0.0)  # fully invested: sum y = k
+        add(row(k=1.0), 0.0, np.inf)
+        add(sp.hstack([eye, sp.csr_matrix((n, 1)), pad]), 0.0, np.inf)  # long only
+        add(sp.hstack([eye, sp.csr_matrix(-self.caps[:, None]), pad]), -np.inf, 0.0)  # y <= cap * k
+
+        if sectors is not None and sector_caps is not None:
+            labels = pd.Series(np.asarray(sectors, dtype=object))
+            for sector in labels.dropna().unique():
+                cap = sector_caps.get(sector, 1.0) if isinstance(sector_caps, dict) else sector_caps
+                if cap < 1.0:
+                    add(row(y=(labels == sector).to_numpy(dtype=np.float64), k=-cap), -np.inf, 0.0)
+
+        if use_turnover:
+            current = sp.csr_matrix(np.asarray(current, dtype=np.float64)[:, None])
+            add(sp.hstack([-eye, current, eye]), 0.0, np.inf)  # t >= y - k * current
+            add(sp.hstack([eye, -current, eye]), 0.0, np.inf)  # t >= k * current - y
+            add(row(k=-turnover, t=1.0), -np.inf, 0.0)  # sum t <= k * turnover
+
+        self.A = sp.vstack([b for b, _, _ in blocks], format="csr")
+        self.l = np.concatenate([lo for _, lo, _ in blocks])
+        self.u = np.concatenate([hi for _, _, hi in blocks])
+
+    def performance(self, weights):
+        ret = weights @ self.mu
+        vol = np.sqrt(weights @ self.cov @ weights)
+        return ret, vol, ret / vol
+
+    def _solve(self, P_scale, q, extra_row, extra_value):
+        P = np.zeros((self.size, self.size))
+        P[:self.n, :self.n] = P_scale * self.cov
+        A = sp.vstack([self.A, sp.csr_matrix(extra_row[None, :])], format="csr")
+        l = np.append(self.l, extra_value)
+        u = np.append(self.u, extra_value)
+        result = qp.solve(P, q, A, l, u)
+        if result["status"] != "solved":
+            raise ValueError("constraints are infeasible or the solver did not converge")
+        x = result["x"]
+        weights = np.clip(x[:self.n] / x[self.n], 0, None)
+        return weights / weights.sum()
+
+    def _fixed_budget(self):
+        r = np.zeros(self.size)
+        r[self.n] = 1.0
+        return r
+
+    def min_variance(self):
+        return self._solve(1.0, np.zeros(self.size), self._fixed_budget(), 1.0)
+
+    def utility(self, risk_aversion=1.0):
+        # maximize mu'w - risk_aversion / 2 * w'Sw
+        q = np.zeros(self.size)
+        q[:self.n] = -self.mu
+        return self._solve(risk_aversion, q, self._fixed_budget(), 1.0)
+
+    def max_sharpe(self):
+        if self.mu.max() <= 0:
+            return self.min_variance()  # no portfolio has a positive excess return
+        r = np.zeros(self.size)
+        r[:self.n] = self.mu
+        return self._solve(1.0, np.zeros(self.size), r, 1.0)
+
+
+def _cluster_variance(cov, members):
+    # inverse variance weights inside the cluster, as in the HRP paper
+    sub = cov[np.ix_(members, members)]
+    w = 1 / np.diag(sub)
+    w /= w.sum()
+    return w @ sub @ w
+
+
+def hrp(cov_matrix, linkage_method="single"):
+    # Hierarchical risk parity (Lopez de Prado): cluster on correlation distance, order the
+    # assets so similar ones sit together, then split the budget top down by inverse
+    # cluster variance. Nothing is inverted, so it holds up on large, highly correlated
+    # universes where the covariance is badly conditioned.
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    cov = np.asarray(cov_matrix, dtype=np.float64)
+    n = len(cov)
+    if n == 1:
+        return np.ones(1)
+    std = np.sqrt(np.diag(cov))
+    corr = np.clip(cov / np.outer(std, std), -1, 1)
+    distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+    np.fill_diagonal(distance, 0)
+    order = leaves_list(linkage(squareform(distance, checks=False), method=linkage_method))
+
+    weights = np.ones(n)
+    clusters = [order]
+    while clusters:
+        split = []
+        for cluster in clusters:
+            if len(cluster) < 2:
+                continue
+            left, right = cluster[:len(cluster) // 2], cluster[len(cluster) // 2:]
+            var_left = _cluster_variance(cov, left)
+            var_right = _cluster_variance(cov, right)
+            alpha = 1 - var_left / (var_left + var_right)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+            split += [left, right]
+        clusters = split
+    return weights
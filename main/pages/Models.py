@@ -1,16 +1,19 @@
 import streamlit as st
-import requests
 import pandas as pd
 import numpy as np
-import yfinance as yf
 from datetime import datetime, timedelta, date
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.neighbors import KNeighborsRegressor
-import xgboost as xgb
 from sklearn.metrics import mean_squared_error, root_mean_squared_error, mean_absolute_error
 import matplotlib.pyplot as plt
+import backtest
+import features
+import metadata
+import registry
+import similarity
+import store
+import sp500
+import tape
+import training
+import tuning
 
 favicon_path = "main/Tradmincer_big.png"
 st.set_page_config(
@@ -49,80 +52,15 @@ st.sidebar.markdown(
 
 
 
-results = yf.screen('most_actives')
-top10 = results['quotes'][1:150]
-
-currency = {
-    "USD": "$",    
-    "GBP": "£",    
-    "EUR": "€",    
-    "INR": "₹",    
-    "CNY": "¥",    
-    "JPY": "¥",    
-    "CHF": "CHF",  
-    "AED": "د.إ",  
-    "SAR": "﷼",    
-}
-
-
-# Build the ticker line
-ticker_items = []
-for stock in top10:
-    symbol = stock['symbol']
-    price = stock['regularMarketPrice']
-    change = stock['regularMarketChangePercent']
-    curren = stock['currency']
-    color = "green" if change >= 0 else "red"
-    ticker_items.append(f"<span style='margin-right:40px'>{symbol}: {price:.2f}{currency[curren]}<span style='color:{color}'>({change:.2f}%)</span>|</span>")
-
-ticker_line = " ".join(ticker_items)
-
-st.markdown(
-    f"""
-    <style>
-    .ticker {{
-      width: 120%;
-      overflow: hidden;
-      white-space: nowrap;
-      box-sizing: border-box;
-    }}
-    .ticker-text {{
-      display: inline-block;
-      padding-left: 100%;
-      animation: ticker 39s linear infinite;
-      font-size: 20px;
-      font-family: monospace;
-    }}
-    @keyframes ticker {{
-      0%   {{ transform: translateX(0%); }}
-      100% {{ transform: translateX(-100%); }}
-    }}
-    
-    </style>
-    <div class="ticker">
-      <div class="ticker-text">{ticker_line}</div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(tape.ticker_html(), unsafe_allow_html=True)
 
 
 st.markdown("<h3 style='color: #00F0A8;'>Choose your stock to get started</h3>", unsafe_allow_html=True)
 
 
 ################################### tickers getting Functions #######################################
-@st.cache_data
-def get_sp500():
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    response = requests.get(url, headers=headers)
-    table = pd.read_html(response.text)[0]
-    return table["Symbol"].tolist()
 
-tickers = get_sp500()
+tickers = sp500.get_sp500()
 
 if 'tick' not in st.session_state:
     st.session_state['tick'] = tickers[0]
@@ -132,95 +70,67 @@ st.session_state['tick'] = stock_symbol
 
 
 ######################################### Ticker Tape #######################################
-tick = yf.Ticker(st.session_state['tick'])
-meta = tick.info
+meta = metadata.info(st.session_state['tick'])
 
 day = date.today()
 
-data = yf.download(st.session_state['tick'], start="2015-01-01", end=day, progress=False)
+bars = store.load(st.session_state['tick'], start="2015-01-01", end=day)
 st.markdown(f"<h4 style='color: #db4237;'>Record of Last 10 years of {meta['longName']}</h4>", unsafe_allow_html=True)
-st.dataframe(data)
+st.dataframe(bars)
 
 
 ######################################## Feature adding #######################################
-data['Return'] = data['Close'].pct_change()  # target
-data['MA10'] = data['Close'].rolling(10).mean()
-data['MA50'] = data['Close'].rolling(50).mean()
-data['Volatility'] = data['Return'].rolling(20).std()
-data = data.dropna()
+# rolling state per symbol, a new daily bar is an O(1) update instead of a rescan of 10 years
+feature_state = features.get(stock_symbol, bars)
+data = feature_state.frame
 st.success("Features added successfully!")
 st.info("for your exposure, we are showing you only top 10 rows of the dataset")
 st.write(data.head(10))
 
 ######################################## Train test Splitting ####################################
-features = ['Open','High','Low','Close','Volume','MA10','MA50','Volatility']
-
-x = data[features]
-y = data['Return']
-
-x_train, x_test, y_train, y_test = train_test_split(x,y, test_size=0.2, random_state=42, shuffle=False)
+x_train, x_test, y_train, y_test = training.split(data)
 st.write(f"Training samples: {x_train.shape[0]}, Testing samples: {x_test.shape[0]}")
 
 
-##################################### scalling ##############################################
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(x_train)
-X_test_scaled = scaler.transform(x_test)
-
-st.success("Data Scaled successfully!")
-
-##################################### Model Training ########################################
-model_xgb = xgb.XGBRegressor(
-    booster='gbtree',             # Booster type ('gbtree', 'gblinear', or 'dart')
-    n_jobs=4,                     # Parallel threads; -1 uses all cores.
-    random_state=42,              # Random seed for reproducibility.
-    verbosity=1,                  # Output verbosity.
-    
-    n_estimators=500,             # Number of boosting rounds.
-    learning_rate=0.05,           # Step size shrinkage.
-    max_depth=5,                  # Maximum tree depth.
-    min_child_weight=1,           # Minimum sum of instance weight in a child node.
-    gamma=0.2,                    # Minimum loss reduction for a split.
-    subsample=0.8,                # Subsample ratio of training instances.
-    colsample_bytree=0.8,         # Subsample ratio of columns per tree.
-    reg_alpha=0.1,                # L1 regularization.
-    reg_lambda=1,                 # L2 regularization.
-    
-    objective='reg:squarederror', # Learning objective (e.g., regression with squared loss).
-    eval_metric='rmse'            # Evaluation metric.
-)
-
-model_rf = RandomForestRegressor(
-    n_estimators=100,
-    max_depth=5,
-    min_samples_split=2,
-    min_samples_leaf=1,
-    max_features=5,
-    random_state=42,
-    oob_score=True,
-    bootstrap=True,
-    n_jobs=-1
-)
+################################## Hyperparameter Tuning ####################################
+with st.expander("Hyperparameter tuning"):
+    tuned = tuning.load(stock_symbol)
+    if tuned is None:
+        st.info(f"No tuned configuration for {stock_symbol} yet, the default hyperparameters are used.")
+    else:
+        st.write(f"Tuned on data up to {tuned['last_bar']} in {tuned['seconds']}s ({tuned['tuned_at']})")
+        st.json({"xgb": tuned["xgb"], "rf": tuned["rf"], "validation_rmse": tuned["validation_rmse"]})
 
-model_knn = KNeighborsRegressor(
-    n_neighbors=5,
-    weights='uniform',
-    algorithm='auto',
-    leaf_size=30,
-    p=2,
-    metric='minkowski',
-    n_jobs=-1
-)
+    st.write("Successive halving search over XGBoost and Random Forest with early stopping on a time-ordered validation block.")
+    if st.button(f"Tune models for {stock_symbol}"):
+        with st.spinner("Searching hyperparameters..."):
+            tuning.tune(stock_symbol, data)
+        st.rerun()
 
-model_knn.fit(X_train_scaled, y_train)
-st.success("Model Trained successfully on KNN!")
+params = tuning.best_params(stock_symbol)
 
-model_rf.fit(X_train_scaled, y_train)
-st.success("Model Trained successfully on Random Forest!")
+##################################### Model Training ########################################
+# models are only fitted when the ticker, its bars or the hyperparameters changed,
+# otherwise the scaler and the three models come straight from the registry
+model_key = registry.key(stock_symbol, bars, params)
+bundle = registry.load(model_key)
+
+if bundle is None:
+    bundle = training.fit(x_train, y_train, params)
+    registry.save(model_key, bundle)
+    st.success("Model Trained successfully on KNN, Random Forest and XGBoost!")
+else:
+    st.success("Trained models loaded from the registry!")
+
+scaler = bundle["scaler"]
+model_xgb = bundle["xgb"]
+model_rf = bundle["rf"]
+model_knn = bundle["knn"]
 
+##################################### scalling ##############################################
+X_test_scaled = scaler.transform(x_test)
 
-model_xgb.fit(X_train_scaled, y_train)
-st.success("Model Trained successfully on XGBoost!")
+st.success("Data Scaled successfully!")
 
 ##################################### Model Evaluation ########################################
 y_pred_xgb = model_xgb.predict(X_test_scaled)
@@ -292,6 +202,37 @@ st.line_chart(pred_df)
 
 st.info(f"Now the models have trained on {stock_symbol} stock data, you can predict future returns by entering future stock data in the sidebar and clicking the 'Predict Future Returns' button.")
 
+####################################### Walk-forward Backtest ####################################
+@st.cache_data(show_spinner="Running walk-forward backtest...")
+def run_backtest(_data, _params, key, n_folds):
+    # `key` already identifies ticker, bars and params, so those aren't hashed
+    return backtest.run(_data, n_folds=n_folds, params=_params)
+
+st.markdown("<h3 style='color: #00F0A8;'>Walk-forward Backtest</h3>", unsafe_allow_html=True)
+st.write("Retrains the models on an expanding window and tests each one on the block of days that follows it.")
+
+n_folds = st.slider("Number of folds", min_value=5, max_value=40, value=backtest.FOLDS)
+if st.checkbox("Run walk-forward backtest"):
+    per_fold, summary = run_backtest(data, params, model_key, n_folds)
+
+    st.dataframe(summary, use_container_width=True)
+    st.line_chart(per_fold.pivot(index="test_start", columns="model", values="rmse"), x_label="fold start", y_label="RMSE")
+    with st.expander("Per fold metrics"):
+        st.dataframe(per_fold, use_container_width=True)
+
+################################### Similar Historical Patterns ##################################
+st.markdown("<h3 style='color: #00F0A8;'>Similar Historical Patterns</h3>", unsafe_allow_html=True)
+
+pattern_index = similarity.load()
+if not len(pattern_index.meta):
+    st.info("The pattern index is empty, build it with `python main/similarity.py`.")
+else:
+    st.write(f"Windows across the S&P 500 whose last {pattern_index.window} daily returns move most like {stock_symbol}'s last {pattern_index.window} days.")
+    matches = pattern_index.query(stock_symbol, k=10, refresh=False)
+    if not matches.empty:
+        st.dataframe(matches, use_container_width=True)
+        st.info(f"Average return over the 20 days after these windows: {matches['forward_return'].mean():.2%}")
+
 ####################################### Initialize session_state #################################
 if 'open_price' not in st.session_state:
     st.session_state['open_price'] = float(data['Open'].iloc[-1])
@@ -327,10 +268,11 @@ with st.sidebar.form("future_form"):
     st.session_state['volume'] = volume
 
 
-    # Compute moving averages and volatility from recent historical data
-    ma10 = data['Close'].rolling(10).mean().iloc[-1]
-    ma50 = data['Close'].rolling(50).mean().iloc[-1]
-    volatility = data['Return'].rolling(20).std().iloc[-1]
+    # Moving averages and volatility straight from the rolling feature state
+    latest = feature_state.latest()
+    ma10 = latest['MA10']
+    ma50 = latest['MA50']
+    volatility = latest['Volatility']
 
     # Prepare feature vector
     future_features = pd.DataFrame({
@@ -1,14 +1,22 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import requests
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import date, datetime, timedelta
 import time
-from scipy.optimize import minimize
 import plotly.express as px
 import matplotlib.cm as cm
+import analytics
+import covariance
+import montecarlo
+import optimizer
+import quotes
+import rebalance
+import risk
+import scenarios
+import store
+import sp500
+import tape
 
 
 favicon_path = "main/Tradmincer_big.png"
@@ -46,62 +54,7 @@ st.sidebar.markdown(
 
 
 
-results = yf.screen('most_actives')
-top10 = results['quotes'][1:150]
-
-currency = {
-    "USD": "$",    
-    "GBP": "£",    
-    "EUR": "€",    
-    "INR": "₹",    
-    "CNY": "¥",    
-    "JPY": "¥",    
-    "CHF": "CHF",  
-    "AED": "د.إ",  
-    "SAR": "﷼",    
-}
-
-
-# Build the ticker line
-ticker_items = []
-for stock in top10:
-    symbol = stock['symbol']
-    price = stock['regularMarketPrice']
-    change = stock['regularMarketChangePercent']
-    curren = stock['currency']
-    color = "green" if change >= 0 else "red"
-    ticker_items.append(f"<span style='margin-right:40px'>{symbol}: {price:.2f}{currency[curren]}<span style='color:{color}'>({change:.2f}%)</span>|</span>")
-
-ticker_line = " ".join(ticker_items)
-
-st.markdown(
-    f"""
-    <style>
-    .ticker {{
-      width: 120%;
-      overflow: hidden;
-      white-space: nowrap;
-      box-sizing: border-box;
-    }}
-    .ticker-text {{
-      display: inline-block;
-      padding-left: 100%;
-      animation: ticker 39s linear infinite;
-      font-size: 20px;
-      font-family: monospace;
-    }}
-    @keyframes ticker {{
-      0%   {{ transform: translateX(0%); }}
-      100% {{ transform: translateX(-100%); }}
-    }}
-    
-    </style>
-    <div class="ticker">
-      <div class="ticker-text">{ticker_line}</div>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(tape.ticker_html(), unsafe_allow_html=True)
 
 
 st.title("Portfolio Optimization and Analysis")
@@ -110,19 +63,9 @@ st.write("This page allows you to analyze and optimize your stock portfolio usin
 st.markdown("<h3 style='color: #00F0A8;'>Choose your stock to get started</h3>", unsafe_allow_html=True)
 
 ############################################## stock Data Fetching #######################################
-@st.cache_data
-def get_sp500():
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    response = requests.get(url, headers=headers)
-    table = pd.read_html(response.text)[0]
-    return table["Symbol"].tolist()
 
 
-tickers = get_sp500()
+tickers = sp500.get_sp500()
 
 if 'tick' not in st.session_state:
     st.session_state['tick'] = tickers[0]
@@ -151,23 +94,27 @@ with st.sidebar.form("portfolio_form", clear_on_submit=True):
     )
     stock_quantity = st.number_input("Quantity", min_value=1, value=10)
 
-    ticker = yf.Ticker(stock_symbol)
-    u_price = ticker.fast_info['last_price']
-    price = u_price * stock_quantity
-    
-    # st.write("Live Price (fast):", price)
-
-
     submit_button = st.form_submit_button("Add to Portfolio")
 
     if submit_button:
         if stock_symbol in st.session_state["list"]:
           st.sidebar.error(f"{stock_symbol} already added! choose another stock")
         else:
-         st.session_state["list"].append(stock_symbol)
-         st.session_state["quant"].append(stock_quantity)
-         st.session_state["price"].append(price)
-         st.session_state['u_price'].append(u_price)
+         # the quote is only needed once the stock is actually added
+         u_price = quotes.last_price(stock_symbol)
+         if u_price is None:
+          st.sidebar.error(f"No price available for {stock_symbol} right now, try again in a moment")
+         else:
+          st.session_state["list"].append(stock_symbol)
+          st.session_state["quant"].append(stock_quantity)
+          st.session_state["price"].append(u_price * stock_quantity)
+          st.session_state['u_price'].append(u_price)
+
+# revalue every holding from one batched quote call, shared between sessions for a few seconds
+if st.session_state["list"]:
+    latest = quotes.last_prices(st.session_state["list"])
+    st.session_state['u_price'] = [latest.get(s, p) for s, p in zip(st.session_state["list"], st.session_state['u_price'])]
+    st.session_state["price"] = [p * q for p, q in zip(st.session_state['u_price'], st.session_state["quant"])]
 
 # ✅ Build dataframe after updates
 new_data = pd.DataFrame({
@@ -201,8 +148,11 @@ if new_data.empty:
     st.stop()
 
 
-data = yf.download(new_data['stocks'].tolist(), start="2015-01-01", end=today)
-data = data['Close']
+# returns and covariance of the holdings live in the session, adding a stock only
+# computes its own covariance row/column and resizing one is a rank one update
+book = analytics.sync(st.session_state.get("book"), new_data["stocks"], new_data["price"], "2015-01-01", today)
+st.session_state["book"] = book
+data = book.prices
 st.line_chart(data,x_label="last 10 years till now", y_label="stock prices", use_container_width=True)
 
 if len(new_data["stocks"]) < 2:
@@ -218,10 +168,16 @@ if len(new_data["stocks"]) < 2:
 #         del st.session_state[col]
 #     st.stop()
 
-returns = data.pct_change().dropna()
+returns = book.returns
+
+mean_returns = book.mean_returns
 
-mean_returns = returns.mean()
-cov_matrix = returns.cov()
+# running moments are kept per asset set, a new day of returns only adds to them
+estimator = st.selectbox(
+    "Covariance estimator", covariance.ESTIMATORS,
+    format_func={"sample": "Sample", "ledoit_wolf": "Ledoit-Wolf shrinkage", "ewma": "EWMA (lambda 0.94)"}.get,
+)
+cov_matrix = book.cov_matrix if estimator == "sample" else covariance.estimate(returns, estimator)
 
 col1, col2 = st.columns(2)
 
@@ -233,29 +189,47 @@ with col2:
     st.subheader("Covariance Matrix")
     st.write(cov_matrix)
 
+st.subheader("Current Holdings Risk")
+st.info(f"Daily volatility of your holdings: ${book.volatility():,.2f}")
+st.dataframe(book.exposures().style.format({"value": "${:,.2f}", "weight": "{:.2%}", "risk_contribution": "{:.2%}"}), use_container_width=True)
+
 ################################## Portfolio Simulation/ wieghts ##########################################
 
 num_assets = len(new_data['stocks'])
 
-# Step 4: Portfolio performance function
-def portfolio_performance(weights):
-    ret = np.dot(weights, mean_returns) * 252  # annualized return
-    vol = np.sqrt(np.dot(weights.T, np.dot(cov_matrix * 252, weights)))  # annualized volatility
-    sharpe = ret / vol
-    return ret, vol, sharpe
-
-# Step 5: Objective -> minimize negative Sharpe (maximize Sharpe)
-def neg_sharpe(weights):
-    return -portfolio_performance(weights)[2]
-
-# Step 6: Constraints (sum of weights = 1)
-constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
-bounds = tuple((0, 1) for asset in range(num_assets))
-init_guess = num_assets * [1. / num_assets]
-
-# Step 7: Optimization
-opt_results = minimize(neg_sharpe, init_guess, bounds=bounds, constraints=constraints)
-opt_weights = opt_results.x
+# Step 4: annualized inputs and analytic gradients, built once per rerun
+problem = optimizer.MeanVariance(mean_returns, cov_matrix)
+portfolio_performance = problem.performance
+
+# Step 5: Optimization -> maximize Sharpe (sum of weights = 1, long only)
+with st.expander("Constraints"):
+    st.write("Caps per asset and per GICS sector, and a limit on turnover away from your current holdings. Solved as a quadratic program, which stays fast for hundreds of assets.")
+    cn1, cn2, cn3 = st.columns(3)
+    with cn1:
+        asset_cap = st.slider("Max weight per asset", min_value=max(0.01, round(1 / num_assets + 0.005, 2)), max_value=1.0, value=1.0, step=0.01)
+    with cn2:
+        sector_cap = st.slider("Max weight per sector", min_value=0.05, max_value=1.0, value=1.0, step=0.05)
+    with cn3:
+        max_turnover = st.slider("Max turnover vs. current holdings", min_value=0.0, max_value=2.0, value=2.0, step=0.05)
+
+optimizer_mode = st.radio("Optimizer", ["Max Sharpe", "Hierarchical risk parity"], horizontal=True,
+                          help="Hierarchical risk parity clusters correlated stocks and splits the budget by cluster risk, no matrix inversion needed. The constraints above apply to max Sharpe.")
+
+opt_weights = problem.max_sharpe()
+if optimizer_mode == "Hierarchical risk parity":
+    # same cached covariance as max Sharpe, nothing is re-derived
+    opt_weights = optimizer.hrp(cov_matrix)
+elif asset_cap < 1.0 or sector_cap < 1.0 or max_turnover < 2.0:
+    holdings = new_data["price"].to_numpy(dtype=float)
+    constrained = optimizer.Constrained(
+        mean_returns, cov_matrix, caps=asset_cap,
+        sectors=sp500.sectors().reindex(new_data["stocks"]).to_numpy(), sector_caps=sector_cap,
+        current=holdings / holdings.sum(), turnover=max_turnover if max_turnover < 2.0 else None,
+    )
+    try:
+        opt_weights = constrained.max_sharpe()
+    except ValueError:
+        st.error("No portfolio satisfies these constraints, showing the unconstrained optimum instead.")
 
 coll1, coll2 = st.columns(2)
 
@@ -286,6 +260,26 @@ with coll2:
    st.pyplot(fig)
 
 
+############################################# Efficient Frontier ###########################
+st.subheader("Efficient Frontier")
+
+frontier, frontier_weights = problem.frontier(optimizer.FRONTIER_POINTS)
+opt_ret, opt_vol, _ = portfolio_performance(opt_weights)
+
+col1, col2, col3 = st.columns([1,2,1])
+with col2:
+    fig, ax = plt.subplots(figsize=(5, 3))
+    points = ax.scatter(frontier["volatility"], frontier["return"], c=frontier["sharpe"], cmap="viridis", s=12)
+    ax.scatter([opt_vol], [opt_ret], color="red", marker="*", s=120, label=optimizer_mode)
+    ax.set_xlabel("Volatility", fontsize=8)
+    ax.set_ylabel("Annual Return", fontsize=8)
+    ax.set_title("Efficient Frontier", fontsize=10)
+    ax.legend(fontsize=7)
+    fig.colorbar(points, ax=ax, label="Sharpe")
+    st.pyplot(fig, use_container_width=False)
+    plt.close(fig)
+
+
 #############################################moint carlo simulation###########################
 # Monte Carlo Simulation
 # st.subheader("Monte Carlo Simulation")
@@ -308,49 +302,173 @@ with col2:
     )
 
 
-num_simulations = 100
-num_days = 252  # 1 year
+@st.cache_data(show_spinner="Simulating portfolio paths...")
+def simulate_paths(_mean, _cov, key, weights, n_paths, days):
+    # `key` identifies the holdings, the last date and the covariance estimator, so the
+    # inputs aren't hashed; a rerun that changes neither them nor the weights is free
+    return montecarlo.simulate(_mean, _cov, np.array(weights), n_paths=n_paths, days=days)
 
-simulations = np.zeros((num_days, num_simulations))
+num_simulations = st.select_slider("Simulated paths", options=[1_000, 10_000, 100_000], value=100_000)
+num_days = 252  # 1 year
+mc_key = (tuple(returns.columns), str(returns.index[-1]), estimator)
 
-for sim in range(num_simulations):
-    daily_returns = np.random.multivariate_normal(mean_returns, cov_matrix, num_days)
-    portfolio_returns = daily_returns.dot(opt_weights)
-    simulations[:, sim] = (1 + portfolio_returns).cumprod()
+# covariance is factorized once and paths are drawn in chunks, only the 5/50/95
+# percentile bands are kept instead of every path
+mc = simulate_paths(mean_returns, cov_matrix, mc_key, tuple(opt_weights), num_simulations, num_days)
+bands = mc["bands"]
 
 # put inside a narrow column to keep it small
 col1, col2, col3 = st.columns([1,2,1])  
 
 with col2:  
     fig, ax = plt.subplots(figsize=(4, 3))  # controlled size  
-    ax.plot(simulations, color="blue", alpha=0.2)
-    ax.set_title("Monte Carlo Simulated Portfolio Value Paths", fontsize=10)
+    ax.fill_between(bands.index, bands["p5"], bands["p95"], color="blue", alpha=0.2, label="5% - 95%")
+    ax.plot(bands.index, bands["p50"], color="blue", linewidth=1.5, label="median")
+    ax.set_title(f"Monte Carlo Portfolio Value ({num_simulations:,} paths)", fontsize=10)
     ax.set_xlabel("Days", fontsize=8)
     ax.set_ylabel("Cumulative Return", fontsize=8)
+    ax.legend(fontsize=7)
     st.pyplot(fig, use_container_width=False)
+    plt.close(fig)
+
+
+@st.cache_data(show_spinner="Estimating tail statistics...")
+def tail_estimates(_mean, _cov, key, weights, days, method, control_variate, target_se):
+    return montecarlo.estimate(
+        _mean, _cov, np.array(weights), days=days,
+        method=method, control_variate=control_variate, target_se=target_se,
+    )
+
+with st.expander("Monte Carlo tail estimates (variance reduced)"):
+    st.write("Estimates terminal-value statistics with a standard error and a 95% confidence interval, and stops once the 95% VaR is as precise as requested.")
+    vr1, vr2, vr3 = st.columns(3)
+    with vr1:
+        mc_method = st.selectbox("Sampling", montecarlo.METHODS, index=montecarlo.METHODS.index("sobol"))
+    with vr2:
+        # antithetic and Sobol replicates already match the mean, the control adds nothing there
+        mc_control = st.checkbox("Control variate (analytic mean)", value=True,
+                                 disabled=mc_method not in montecarlo.CONTROL_METHODS,
+                                 help="Only used with plain sampling")
+    with vr3:
+        mc_target = st.number_input("Target std. error of VaR (%)", min_value=0.01, max_value=5.0, value=0.1, step=0.01)
+
+    # an expander runs its body even when collapsed, the estimate only runs when asked for
+    if st.checkbox("Run tail estimates"):
+        tail = tail_estimates(
+            mean_returns, cov_matrix, mc_key, tuple(opt_weights), num_days,
+            mc_method, mc_control and mc_method in montecarlo.CONTROL_METHODS, mc_target / 100,
+        )
+        st.dataframe(tail["estimates"], use_container_width=True)
+        st.info(f"{tail['n_paths']:,} paths in {tail['replicates']} replicates "
+                f"(analytic expected terminal value: {tail['analytic_mean']:.4f})")
 
 
 ##################################################### Risk Metrics #################################
 
 st.subheader("Value at Risk (VaR)")
 
-portfolio_returns = returns.dot(opt_weights)
-VaR_95 = np.percentile(portfolio_returns, 5)
+# every candidate portfolio is a row of one weight matrix, risk for all of them is one batched pass
+candidates = pd.DataFrame(
+    [opt_weights, book.exposures()["weight"].to_numpy(), np.full(num_assets, 1 / num_assets)],
+    index=["Optimal", "Current holdings", "Equal weight"], columns=returns.columns,
+)
+historical = risk.historical(returns, candidates, index=candidates.index)
+VaR_95 = -historical.loc["Optimal", ("VaR", 95, 1)]
 
 st.warning(f"95% VaR: {VaR_95:.2%} (max expected daily loss with 95% confidence)")
 
+with st.expander("VaR and CVaR by method, level and horizon"):
+    risk_method = st.radio("Method", ["Historical", "Parametric", "Monte Carlo"], horizontal=True)
+    if risk_method == "Historical":
+        risk_table = historical
+    elif risk_method == "Parametric":
+        risk_table = risk.parametric(mean_returns, cov_matrix, candidates, index=candidates.index)
+    else:
+        risk_table = risk.monte_carlo(mean_returns, cov_matrix, candidates, index=candidates.index)
+    st.write("Losses as a share of portfolio value; horizon in trading days.")
+    st.dataframe(risk_table.style.format("{:.2%}"), use_container_width=True)
+
+daily_returns = risk.portfolio_returns(returns, candidates)
+if len(returns) > risk.WINDOW:
+    rolling_var, rolling_cvar = risk.rolling_var(daily_returns, index=returns.index)
+    rolling_var.columns = candidates.index
+    st.write(f"Rolling 95% one-day VaR ({risk.WINDOW} trading day window)")
+    st.line_chart(rolling_var, use_container_width=True)
+
 
 ############################################# Stress Test ##########################################
 
 st.subheader("Stress Test: Maximum Drawdown")
 
-cumulative = (1 + portfolio_returns).cumprod()
-roll_max = cumulative.cummax()
-drawdown = (cumulative - roll_max) / roll_max
-max_drawdown = drawdown.min()
+portfolio_returns = daily_returns[:, 0]
+max_drawdown = risk.drawdown(portfolio_returns).min()
 
 st.error(f"Maximum Drawdown: {max_drawdown:.2%}")
 
+if len(returns) > risk.WINDOW:
+    rolling_drawdown = risk.rolling_max_drawdown(daily_returns, index=returns.index)
+    rolling_drawdown.columns = candidates.index
+    st.write(f"Rolling maximum drawdown ({risk.WINDOW} trading day window)")
+    st.line_chart(rolling_drawdown, use_container_width=True)
+
+############################################# Scenario Analysis ##########################################
+
+@st.cache_data(show_spinner="Building scenario library...")
+def scenario_library(_prices, _returns, key, sectors):
+    # historical windows and the worst rolling windows of the holdings' own history,
+    # plus factor shocks through each holding's beta to the market
+    market = store.load(scenarios.MARKET, columns=["Close"], start="2015-01-01", end=key[1])["Close"].pct_change()
+    parts = [scenarios.historical_moves(_prices)]
+    if market.notna().sum() > 1:
+        parts.append(scenarios.factor_moves(scenarios.betas(_returns, market), sectors))
+    parts.append(scenarios.rolling_moves(_prices))
+    return pd.concat(parts)
+
+st.subheader("Scenario Analysis")
+st.write("Applies your current holdings to historical shock windows, the worst rolling 20-day windows and factor shocks, all in one batched product.")
+
+holdings = pd.Series(new_data["price"].to_numpy(dtype=float), index=new_data["stocks"])
+library = scenario_library(
+    data, returns, (tuple(returns.columns), str(today)),
+    tuple(sp500.sectors().reindex(returns.columns).fillna("")),
+)
+scenario_results = scenarios.evaluate(library, holdings)
+
+st.error(f"Worst scenario: {scenario_results.index[0]} ({scenario_results['return'].iloc[0]:.2%}, ${scenario_results['pnl'].iloc[0]:,.2f})")
+st.dataframe(scenario_results.style.format({
+    "pnl": "${:,.2f}", "return": "{:.2%}", "worst_holding_pnl": "${:,.2f}",
+}), use_container_width=True)
+
+
+############################################# Rebalancing Backtest ##########################################
+
+@st.cache_data(show_spinner="Backtesting rebalanced portfolios...")
+def run_rebalance(_returns, key, frequency, cost_bps):
+    # `key` already identifies the holdings and the last date, so the returns aren't hashed
+    return rebalance.run(_returns, frequency=frequency, cost_bps=cost_bps, workers=len(rebalance.STRATEGIES))
+
+st.subheader("Out-of-sample Rebalancing Backtest")
+st.write(f"Re-optimizes on the previous {rebalance.LOOKBACK} trading days at every rebalance, lets the weights drift in between and charges transaction costs on turnover.")
+
+rb1, rb2 = st.columns(2)
+with rb1:
+    rebalance_frequency = st.radio("Rebalance", list(rebalance.FREQUENCIES), horizontal=True)
+with rb2:
+    cost_bps = st.number_input("Transaction cost (bps per trade)", min_value=0, max_value=100, value=rebalance.COST_BPS)
+
+if len(returns) <= rebalance.LOOKBACK:
+    st.warning(f"Need more than {rebalance.LOOKBACK} days of common history to backtest")
+elif st.checkbox("Run rebalancing backtest"):
+    equity, rebalance_summary, rebalance_weights = run_rebalance(
+        returns, (tuple(returns.columns), str(returns.index[-1])), rebalance_frequency, cost_bps
+    )
+    st.line_chart(equity, x_label="date", y_label="growth of 1", use_container_width=True)
+    st.dataframe(rebalance_summary.style.format({
+        "annual_return": "{:.2%}", "volatility": "{:.2%}", "sharpe": "{:.2f}",
+        "max_drawdown": "{:.2%}", "annual_turnover": "{:.2f}", "total_return": "{:.2%}",
+    }), use_container_width=True)
+
+
 ###########################################Final Portfolio Metrics ##########################################
 
 ret, vol, sharpe = portfolio_performance(opt_weights)
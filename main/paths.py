@@ -0,0 +1,14 @@
+import os
+
+# Everything the app persists locally (price history, models, caches) lives
+# under one directory so it can be mounted as a volume or wiped in one go.
+DATA_DIR = os.environ.get(
+    "TRADMINCER_DATA",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"),
+)
+
+
+def data_path(*parts):
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import ringbuffer
+import store
+
+# one refresh schedule per watched symbol, shared by every session
+POLL_SECONDS = 30
+
+# symbols nobody has looked at for this long stop being polled
+IDLE_SECONDS = 5 * 60
+
+
+class Feed:
+    def __init__(self, symbol, capacity=ringbuffer.CAPACITY):
+        self.symbol = symbol
+        # fixed size history, the same bytes no matter how many sessions watch it
+        self.buffer = ringbuffer.RingBuffer(capacity)
+        self.version = 0
+        self.last_seen = time.time()
+        self.next_poll = 0.0
+        self.changed = threading.Condition()
+
+    def publish(self, bars):
+        with self.changed:
+            self.buffer.extend(bars)
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait(self, version, window=None, timeout=None):
+        # block until there is something newer than `version`, then hand back the last `window` bars
+        self.last_seen = time.time()
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.buffer.frame(window)
+
+
+class Poller:
+    def __init__(self, interval=POLL_SECONDS, capacity=ringbuffer.CAPACITY):
+        self.interval = interval
+        self.capacity = capacity
+        self._feeds = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, symbol):
+        with self._lock:
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                feed = self._feeds[symbol] = Feed(symbol, self.capacity)
+            feed.last_seen = time.time()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="intraday-poller", daemon=True)
+                self._thread.start()
+        return feed
+
+    def _poll(self, feed):
+        last = feed.buffer.last_time()
+        if last is None:
+            data = store.download(feed.symbol, "1m", period="1d")
+        else:
+            # only ask for bars from the last one we have, it may still have been forming
+            data = store.download(feed.symbol, "1m", start=last)
+        if data.empty:
+            return
+        feed.publish(data[["Close", "Volume"]].rename(columns={"Close": "Price"}))
+
+    def _run(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                for symbol, feed in list(self._feeds.items()):
+                    if now - feed.last_seen > IDLE_SECONDS:
+                        del self._feeds[symbol]
+                due = [feed for feed in self._feeds.values() if feed.next_poll <= now]
+
+            for feed in due:
+                try:
+                    self._poll(feed)
+                except Exception:
+                    pass  # try again on the next tick
+                feed.next_poll = now + self.interval
+
+            time.sleep(1)
+
+
+_poller = Poller()
+
+
+def subscribe(symbol):
+    return _poller.subscribe(symbol)
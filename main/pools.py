@@ -0,0 +1,9 @@
+import multiprocessing
+
+
+def context():
+    # pools are started from inside the streamlit server, a heavily threaded process that
+    # may already have run OpenMP (xgboost); a forked child can inherit a held lock and
+    # hang, so workers start from a clean forkserver (spawn where that doesn't exist)
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
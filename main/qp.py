@@ -0,0 +1,83 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import cho_factor, cho_solve
+
+# ADMM for convex quadratic programs in the OSQP form
+#   minimize 1/2 x'Px + q'x  subject to  l <= Ax <= u
+# The KKT matrix is inverted once (again only when rho is rescaled), every
+# iteration after that is one dense matvec and a few sparse products.
+RHO = 0.1
+SIGMA = 1e-6
+ALPHA = 1.6
+# weights are reported to a basis point, 1e-5 is well inside that
+EPS_ABS = 1e-5
+EPS_REL = 1e-5
+MAX_ITER = 4000
+CHECK_EVERY = 10
+ADAPT_EVERY = 50
+
+# equality rows get a much stiffer penalty, like OSQP does
+EQ_SCALE = 1e3
+
+
+def _norm(v):
+    return np.abs(v).max() if len(v) else 0.0
+
+
+def _factor(P, A, rho, sigma):
+    # K is symmetric positive definite; for a few hundred to a few thousand variables
+    # a matvec with the explicit inverse is about twice as fast as two triangular solves
+    K = P + sigma * np.eye(P.shape[0]) + (A.T @ sp.diags(rho) @ A).toarray()
+    return cho_solve(cho_factor(K, check_finite=False), np.eye(len(K)), check_finite=False)
+
+
+def solve(P, q, A, l, u, x0=None, y0=None, rho=RHO, sigma=SIGMA, alpha=ALPHA,
+          eps_abs=EPS_ABS, eps_rel=EPS_REL, max_iter=MAX_ITER):
+    # P dense (n, n), A sparse (m, n); returns the primal and dual solution and a status
+    P = np.asarray(P, dtype=np.float64)
+    q = np.asarray(q, dtype=np.float64)
+    A = sp.csr_matrix(A, dtype=np.float64)
+    AT = A.T.tocsr()
+    n, m = len(q), A.shape[0]
+
+    x = np.zeros(n) if x0 is None else np.asarray(x0, dtype=np.float64)
+    y = np.zeros(m) if y0 is None else np.asarray(y0, dtype=np.float64)
+    z = np.clip(A @ x, l, u)
+
+    equality = np.isclose(l, u)
+    scale = np.where(equality, EQ_SCALE, 1.0)
+    rho_vec = rho * scale
+    K_inv = _factor(P, A, rho_vec, sigma)
+
+    status = "max_iter"
+    for it in range(1, max_iter + 1):
+        x_t = K_inv @ (sigma * x - q + AT @ (rho_vec * z - y))
+        z_t = A @ x_t
+
+        x = alpha * x_t + (1 - alpha) * x
+        z_relaxed = alpha * z_t + (1 - alpha) * z
+        z_new = np.clip(z_relaxed + y / rho_vec, l, u)
+        y = y + rho_vec * (z_relaxed - z_new)
+        z = z_new
+
+        if it % CHECK_EVERY:
+            continue
+        Ax, Px, ATy = A @ x, P @ x, AT @ y
+        r_prim = _norm(Ax - z)
+        r_dual = _norm(Px + q + ATy)
+        eps_prim = eps_abs + eps_rel * max(_norm(Ax), _norm(z))
+        eps_dual = eps_abs + eps_rel * max(_norm(Px), _norm(ATy), _norm(q))
+        if r_prim <= eps_prim and r_dual <= eps_dual:
+            status = "solved"
+            break
+
+        if it % ADAPT_EVERY == 0:
+            # balance the primal and dual residuals, refactorize only on a big change
+            ratio = (r_prim / max(_norm(Ax), _norm(z), 1e-12)) / (r_dual / max(_norm(Px), _norm(ATy), _norm(q), 1e-12) + 1e-12)
+            new_rho = np.clip(rho * np.sqrt(ratio), 1e-6, 1e6)
+            if new_rho > 5 * rho or new_rho < rho / 5:
+                rho = new_rho
+                rho_vec = rho * scale
+                K_inv = _factor(P, A, rho_vec, sigma)
+
+    return {"x": x, "y": y, "status": status, "iterations": it}
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import yfinance as yf
+from yfinance.data import YfData
+
+import store
+
+# last prices are shared by every session in the process for this long
+TTL_SECONDS = 15
+
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+
+_quotes = {}  # symbol -> (fetched_at, price)
+_lock = threading.Lock()
+_fetching = threading.Lock()
+
+
+def _quote(symbols):
+    # one request for every symbol on yahoo's quote endpoint, through yfinance's shared
+    # session so its cookie and crumb are reused
+    data = YfData().get_raw_json(QUOTE_URL, params={
+        "symbols": ",".join(symbols), "fields": "regularMarketPrice", "formatted": "false",
+    })
+    return {
+        quote["symbol"]: float(quote["regularMarketPrice"])
+        for quote in data["quoteResponse"]["result"]
+        if quote.get("regularMarketPrice") is not None
+    }
+
+
+def _fetch(symbols):
+    try:
+        prices = _quote(symbols)
+    except Exception:
+        prices = {}  # endpoint changed or rate limited, the daily bars below still work
+
+    missing = [s for s in symbols if s not in prices]
+    if missing:
+        # daily bars are enough for a last price, no need for a day of minute bars
+        data = yf.download(missing, period="5d", interval="1d", progress=False)
+        if not data.empty:
+            last = data["Close"].ffill().iloc[-1]
+            prices.update({symbol: float(price) for symbol, price in last.items() if price == price})
+
+    for symbol in symbols:
+        if symbol not in prices:
+            # no quote at all (delisted, or yahoo hiccup), fall back to the last stored close
+            close = store.read(symbol, "1d", ["Close"])["Close"]
+            if len(close):
+                prices[symbol] = float(close.iloc[-1])
+    return prices
+
+
+def _stale(symbols, now):
+    return [s for s in symbols if now - _quotes.get(s, (0.0, None))[0] > TTL_SECONDS]
+
+
+def last_prices(symbols):
+    symbols = list(dict.fromkeys(symbols))
+    with _lock:
+        stale = _stale(symbols, time.time())
+
+    if stale:
+        # one fetch in flight per process, sessions arriving meanwhile reuse its result
+        with _fetching:
+            with _lock:
+                stale = _stale(stale, time.time())
+            if stale:
+                try:
+                    prices = _fetch(stale)
+                except Exception:
+                    prices = {}  # offline, keep serving the last known prices
+                now = time.time()
+                with _lock:
+                    for symbol, price in prices.items():
+                        _quotes[symbol] = (now, price)
+
+    with _lock:
+        return {s: _quotes[s][1] for s in symbols if s in _quotes}
+
+
+def last_price(symbol):
+    return last_prices([symbol]).get(symbol)
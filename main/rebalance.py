@@ -0,0 +1,123 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import optimizer
+import pools
+
+STRATEGIES = ("max_sharpe", "min_variance", "equal_weight")
+FREQUENCIES = {"monthly": "M", "quarterly": "Q"}
+LOOKBACK = 252  # trading days of history each rebalance optimizes on
+COST_BPS = 10  # charged on traded value, one way
+
+# each worker gets the return matrix once, not once per strategy
+_returns = None
+
+
+def rebalance_dates(index, frequency="monthly", lookback=LOOKBACK):
+    # positions of the first trading day of every month/quarter once a full lookback exists
+    periods = index.to_period(FREQUENCIES[frequency])
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return starts[starts >= lookback]
+
+
+def target_weights(strategy, window, previous=None):
+    n = window.shape[1]
+    if strategy == "equal_weight":
+        return np.full(n, 1 / n)
+    problem = optimizer.MeanVariance(window.mean(axis=0), np.cov(window, rowvar=False))
+    # last period's weights are usually close, a warm start saves most SLSQP iterations
+    if strategy == "max_sharpe":
+        return problem.max_sharpe(previous)
+    return problem.min_variance(previous)
+
+
+def simulate(returns, starts, weights, cost_bps=COST_BPS):
+    # Equity curve with drift between rebalances, without a loop over days: inside a
+    # period every asset's value is its weight times its growth since the period
+    # started, taken from one cumulative product over the whole history.
+    T = len(returns)
+    growth = np.vstack([np.ones(returns.shape[1]), np.cumprod(1 + returns, axis=0)])  # growth[t] = after day t - 1
+
+    period = np.searchsorted(starts, np.arange(T), side="right") - 1  # -1 before the first rebalance
+    active = period >= 0
+    base = growth[starts]  # growth when each period's weights were set
+    scaled = weights / base
+    inside = (scaled[period[active]] * growth[1:][active]).sum(axis=1)  # value relative to period start
+
+    # weights drifted to the end of each period, traded back to the next target
+    ends = np.r_[starts[1:], T]
+    drifted = weights * growth[ends] / base
+    drifted /= drifted.sum(axis=1, keepdims=True)
+    turnover = np.abs(weights - np.vstack([np.zeros(returns.shape[1]), drifted[:-1]])).sum(axis=1)
+    cost = turnover * cost_bps / 1e4
+
+    # value at each period start: every earlier period's growth net of its trading cost
+    period_growth = inside[ends - 1 - starts[0]]
+    start_value = np.cumprod(np.r_[1 - cost[0], period_growth[:-1] * (1 - cost[1:])])
+
+    equity = np.full(T, np.nan)
+    equity[active] = start_value[period[active]] * inside
+    return equity, turnover
+
+
+def summarize(equity, turnover, periods_per_year):
+    daily = np.diff(equity) / equity[:-1]
+    years = len(daily) / optimizer.TRADING_DAYS
+    vol = daily.std(ddof=1) * np.sqrt(optimizer.TRADING_DAYS)
+    annual = equity[-1] ** (1 / years) - 1
+    drawdown = (equity / np.maximum.accumulate(equity) - 1).min()
+    return {
+        "annual_return": annual,
+        "volatility": vol,
+        "sharpe": daily.mean() * optimizer.TRADING_DAYS / vol,
+        "max_drawdown": drawdown,
+        "annual_turnover": turnover[1:].mean() * periods_per_year if len(turnover) > 1 else 0.0,
+        "total_return": equity[-1] - 1,
+    }
+
+
+def _init(returns):
+    global _returns
+    _returns = returns
+
+
+def _run(task):
+    strategy, starts, lookback, cost_bps = task
+    weights, previous = [], None
+    for start in starts:
+        previous = target_weights(strategy, _returns[start - lookback:start], previous)
+        weights.append(previous)
+    weights = np.array(weights)
+    equity, turnover = simulate(_returns, starts, weights, cost_bps)
+    return weights, equity, turnover
+
+
+def run(returns, strategies=STRATEGIES, frequency="monthly", lookback=LOOKBACK, cost_bps=COST_BPS, workers=1):
+    # out of sample: every rebalance only sees the `lookback` days before it
+    starts = rebalance_dates(returns.index, frequency, lookback)
+    if not len(starts):
+        raise ValueError(f"need more than {lookback} days of returns to backtest")
+    X = returns.to_numpy(dtype=np.float64)
+    tasks = [(strategy, starts, lookback, cost_bps) for strategy in strategies]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=pools.context(), initializer=_init, initargs=(X,)) as pool:
+            results = list(pool.map(_run, tasks))
+    else:
+        _init(X)
+        results = [_run(task) for task in tasks]
+
+    first = starts[0]
+    per_year = {"monthly": 12, "quarterly": 4}[frequency]
+    equity = pd.DataFrame({s: r[1][first:] for s, r in zip(strategies, results)}, index=returns.index[first:])
+    # the curve starts at 1 before the first day's return
+    equity.loc[returns.index[first - 1]] = 1.0
+    equity = equity.sort_index()
+    summary = pd.DataFrame({s: summarize(equity[s].to_numpy(), r[2], per_year) for s, r in zip(strategies, results)}).T
+    weights = {
+        s: pd.DataFrame(r[0], index=returns.index[starts], columns=returns.columns)
+        for s, r in zip(strategies, results)
+    }
+    return equity, summary, weights
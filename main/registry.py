@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+from paths import data_path
+
+# most recently used bundles stay in memory on top of the files on disk
+MEMORY_SLOTS = 8
+
+# every new trading day gives a ticker a new key; older bundles past this many per
+# ticker are deleted when a new one is saved
+KEEP_PER_TICKER = 5
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def key(ticker, data, params):
+    # same ticker + same bars + same hyperparameters -> same fitted models,
+    # thread counts don't change the fit so the page and the batch job share keys
+    params = {name: {k: v for k, v in p.items() if k != "n_jobs"} for name, p in params.items()}
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return f"{ticker}-{data.index[-1]:%Y%m%d}-{digest.hexdigest()[:16]}"
+
+
+def _path(key):
+    return data_path("models", f"{key}.joblib")
+
+
+def _remember(key, bundle):
+    with _lock:
+        _memory[key] = bundle
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_SLOTS:
+            _memory.popitem(last=False)
+
+
+def load(key):
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+
+    path = _path(key)
+    if not os.path.exists(path):
+        return None
+    bundle = joblib.load(path)
+    _remember(key, bundle)
+    return bundle
+
+
+def _prune(key):
+    # keys are ticker-date-digest and tickers can contain dashes (BRK-B)
+    ticker = key.rsplit("-", 2)[0]
+    folder = os.path.dirname(_path(key))
+    paths = [
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.endswith(".joblib") and name[:-len(".joblib")].rsplit("-", 2)[0] == ticker
+    ]
+    paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0, reverse=True)
+    for path in paths[KEEP_PER_TICKER:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # another process pruned it first
+
+
+def save(key, bundle):
+    path = _path(key)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(bundle, tmp)
+    os.replace(tmp, path)
+    _remember(key, bundle)
+    _prune(key)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# one regular trading session of 1 minute bars
+CAPACITY = 390
+
+
+class RingBuffer:
+    # Preallocated timestamp/price/volume arrays for one symbol. Every value is
+    # written twice, at i and i + capacity, so the newest n points are always a
+    # single contiguous slice and windows come back as views instead of copies.
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.tz = None
+        self.size = 0
+        self._head = 0  # next write slot, always in [0, capacity)
+        self._times = np.zeros(2 * capacity, dtype="datetime64[ns]")
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._volumes = np.zeros(2 * capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._prices.nbytes + self._volumes.nbytes
+
+    def _write(self, i, t, price, volume):
+        for j in (i, i + self.capacity):
+            self._times[j] = t
+            self._prices[j] = price
+            self._volumes[j] = volume
+
+    def append(self, t, price, volume=0):
+        self._write(self._head, t, price, volume)
+        self._head = (self._head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def replace_last(self, price, volume=0):
+        # the newest bar is still forming, overwrite it in place
+        if self.size:
+            i = (self._head - 1) % self.capacity
+            self._write(i, self._times[i], price, volume)
+
+    def _window(self, n=None):
+        n = self.size if n is None else min(n, self.size)
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def times(self, n=None):
+        return self._times[self._window(n)]
+
+    def prices(self, n=None):
+        return self._prices[self._window(n)]
+
+    def volumes(self, n=None):
+        return self._volumes[self._window(n)]
+
+    def last_time(self):
+        if not self.size:
+            return None
+        t = pd.Timestamp(self.times(1)[0])
+        return t.tz_localize("UTC").tz_convert(self.tz) if self.tz else t
+
+    def latest(self):
+        return self.prices(1)[0] if self.size else None
+
+    def previous(self):
+        return self.prices(2)[0] if self.size >= 2 else self.latest()
+
+    def extend(self, frame):
+        # frame: DatetimeIndex plus Price/Volume columns, bars at or after last_time()
+        index = frame.index
+        if index.tz is not None:
+            self.tz = index.tz
+            index = index.tz_convert("UTC").tz_localize(None)
+        times = index.values
+        prices = frame["Price"].to_numpy(dtype=np.float64)
+        volumes = frame["Volume"].fillna(0).to_numpy(dtype=np.int64)
+
+        last = self.times(1)[0] if self.size else None
+        for t, price, volume in zip(times, prices, volumes):
+            if last is not None and t < last:
+                continue
+            if last is not None and t == last:
+                self.replace_last(price, volume)
+            else:
+                self.append(t, price, volume)
+            last = t
+
+    def frame(self, n=None):
+        index = pd.DatetimeIndex(self.times(n))
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return pd.DataFrame({"Price": self.prices(n), "Volume": self.volumes(n)}, index=index)
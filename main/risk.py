@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.stats import norm
+
+import montecarlo
+
+LEVELS = (95, 99)
+HORIZONS = (1, 10)  # trading days
+WINDOW = 252  # rolling window, one trading year
+MC_PATHS = 20_000
+
+# rolling windows are processed in blocks so the window views stay small
+BLOCK = 512
+
+
+# Everything here takes a matrix of portfolios: weights is (n_assets,) or
+# (n_portfolios, n_assets), and portfolio returns are (dates, n_portfolios), so risk
+# for a whole candidate set or frontier is one batched computation.
+
+
+def _weights(weights):
+    return np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+
+def portfolio_returns(returns, weights):
+    return np.asarray(returns, dtype=np.float64) @ _weights(weights).T
+
+
+def horizon_returns(daily, horizon):
+    # overlapping compounded `horizon` day returns, from differences of cumulative log returns
+    if horizon == 1:
+        return daily
+    log = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(np.log1p(daily), axis=0)])
+    return np.expm1(log[horizon:] - log[:-horizon])
+
+
+def _tail_mean(samples, cut, axis=0):
+    # mean of the samples at or below the cut, i.e. the losses beyond VaR
+    tail = samples <= cut
+    return np.where(tail, samples, 0).sum(axis=axis) / tail.sum(axis=axis)
+
+
+def _tail(samples, level, axis=0):
+    # VaR and CVaR as positive losses, the cut interpolated like np.percentile; np.partition
+    # only places the two order statistics around it instead of sorting
+    n = samples.shape[axis]
+    pos = (n - 1) * (100 - level) / 100
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, n - 1)
+    part = np.partition(samples, (lo, hi), axis=axis)
+    low, high = np.take(part, lo, axis=axis), np.take(part, hi, axis=axis)
+    cut = low + (pos - lo) * (high - low)
+    return -cut, -_tail_mean(part, np.expand_dims(cut, axis), axis=axis)
+
+
+def _frame(results, n_portfolios, index=None):
+    # VaR columns first, then CVaR, each by level and horizon
+    results = dict(sorted(results.items(), key=lambda item: (item[0][0] != "VaR", item[0][1:])))
+    columns = pd.MultiIndex.from_tuples(results.keys(), names=["measure", "level", "horizon"])
+    return pd.DataFrame(np.column_stack(list(results.values())), columns=columns,
+                        index=index if index is not None else range(n_portfolios))
+
+
+def historical(returns, weights, levels=LEVELS, horizons=HORIZONS, index=None):
+    daily = portfolio_returns(returns, weights)
+    results = {}
+    for h in horizons:
+        samples = horizon_returns(daily, h)
+        for level in levels:
+            var, cvar = _tail(samples, level)
+            results[("VaR", level, h)] = var
+            results[("CVaR", level, h)] = cvar
+    return _frame(results, daily.shape[1], index)
+
+
+def parametric(mean, cov, weights, levels=LEVELS, horizons=HORIZONS, index=None):
+    # normal daily returns scaled with the square root of time
+    w = _weights(weights)
+    mu = w @ np.asarray(mean, dtype=np.float64)
+    sigma = np.sqrt(np.einsum("ij,jk,ik->i", w, np.asarray(cov, dtype=np.float64), w))
+    results = {}
+    for h in horizons:
+        for level in levels:
+            z = norm.ppf(level / 100)
+            results[("VaR", level, h)] = -(mu * h - z * sigma * np.sqrt(h))
+            results[("CVaR", level, h)] = -(mu * h - sigma * np.sqrt(h) * norm.pdf(z) / (1 - level / 100))
+    return _frame(results, len(w), index)
+
+
+def monte_carlo(mean, cov, weights, levels=LEVELS, horizons=HORIZONS, n_paths=MC_PATHS, seed=None, index=None):
+    # one set of correlated asset draws per horizon, shared by every portfolio
+    w = _weights(weights)
+    chol = montecarlo.cholesky(cov)
+    rng = np.random.default_rng(seed)
+    mean = np.asarray(mean, dtype=np.float64)
+    results = {}
+    for h in horizons:
+        samples = montecarlo.asset_returns(mean * h, chol * np.sqrt(h), n_paths, rng) @ w.T
+        for level in levels:
+            var, cvar = _tail(samples, level)
+            results[("VaR", level, h)] = var
+            results[("CVaR", level, h)] = cvar
+    return _frame(results, len(w), index)
+
+
+def rolling_var(daily, window=WINDOW, level=95, index=None):
+    # trailing VaR and CVaR of each portfolio column. The quantile comes from pandas'
+    # rolling skiplist (one insert and one delete per day, no re-sorting of windows), the
+    # tail mean from one masked pass over strided window views.
+    daily = np.asarray(daily, dtype=np.float64)
+    if daily.ndim == 1:
+        daily = daily[:, None]
+    cut = pd.DataFrame(daily).rolling(window).quantile((100 - level) / 100).to_numpy()[window - 1:]
+    views = sliding_window_view(daily, window, axis=0)  # (dates - window + 1, portfolios, window)
+    cvar = np.empty(cut.shape)
+    for start in range(0, len(views), BLOCK):
+        block = views[start:start + BLOCK]
+        cvar[start:start + BLOCK] = -_tail_mean(block, cut[start:start + BLOCK, :, None], axis=-1)
+    if index is not None:
+        index = index[window - 1:]
+    return pd.DataFrame(-cut, index=index), pd.DataFrame(cvar, index=index)
+
+
+def drawdown(daily):
+    wealth = np.cumprod(1 + np.asarray(daily, dtype=np.float64), axis=0)
+    return wealth / np.maximum.accumulate(wealth, axis=0) - 1
+
+
+def rolling_max_drawdown(daily, window=WINDOW, index=None):
+    # worst peak to trough inside each trailing window: running max of log wealth along
+    # the window axis of a strided view, in blocks
+    daily = np.asarray(daily, dtype=np.float64)
+    if daily.ndim == 1:
+        daily = daily[:, None]
+    log = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(np.log1p(daily), axis=0)])
+    views = sliding_window_view(log, window + 1, axis=0)  # window returns = window + 1 wealth points
+    out = np.empty(views.shape[:2])
+    for start in range(0, len(views), BLOCK):
+        block = views[start:start + BLOCK]
+        out[start:start + BLOCK] = np.expm1((block - np.maximum.accumulate(block, axis=-1)).min(axis=-1))
+    if index is not None:
+        index = index[window - 1:]
+    return pd.DataFrame(out, index=index)
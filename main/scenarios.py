@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# named shock windows inside the store's history (it starts in 2015), peak to trough
+HISTORICAL = {
+    "2015 China devaluation": ("2015-08-17", "2015-08-25"),
+    "2018 Q4 selloff": ("2018-09-20", "2018-12-24"),
+    "2020 COVID crash": ("2020-02-19", "2020-03-23"),
+    "2022 rate shock": ("2022-01-03", "2022-10-12"),
+    "2023 regional banks": ("2023-03-08", "2023-03-13"),
+    "2025 tariff shock": ("2025-04-02", "2025-04-08"),
+}
+
+# every `step` days a `days` long window becomes a scenario too, the worst ones are kept
+ROLLING_DAYS = 20
+ROLLING_STEP = 5
+ROLLING_WORST = 100
+
+# market moves go through each asset's beta to the market, sector moves apply as is
+MARKET = "SPY"
+FACTOR_SHOCKS = {
+    "Market -10%": {"market": -0.10},
+    "Market -20%": {"market": -0.20},
+    "Tech selloff": {"market": -0.05, "sectors": {"Information Technology": -0.20, "Communication Services": -0.12}},
+    "Rates up": {"market": -0.04, "sectors": {"Real Estate": -0.10, "Utilities": -0.08, "Financials": 0.03}},
+    "Oil spike": {"market": -0.03, "sectors": {"Energy": 0.15, "Industrials": -0.06, "Consumer Discretionary": -0.07}},
+}
+
+
+def _fill(moves):
+    # an asset that didn't trade yet in a window takes the average move of the others
+    return moves.T.fillna(moves.mean(axis=1)).T.fillna(0.0)
+
+
+def historical_moves(prices, windows=HISTORICAL):
+    # scenarios x assets matrix of total returns over each window
+    rows = {}
+    for name, (start, end) in windows.items():
+        window = prices.loc[start:end]
+        if len(window) < 2:
+            continue
+        rows[name] = window.ffill().iloc[-1] / window.bfill().iloc[0] - 1
+    return _fill(pd.DataFrame(rows).T.reindex(columns=prices.columns))
+
+
+def rolling_moves(prices, days=ROLLING_DAYS, step=ROLLING_STEP, worst=ROLLING_WORST, weights=None):
+    # every `days` day window of the history as one matrix slice, ranked by the equal
+    # weight (or `weights`) move so only the most severe ones are kept
+    values = prices.ffill().to_numpy(dtype=np.float64)
+    starts = np.arange(0, len(values) - days, step)
+    moves = values[starts + days] / values[starts] - 1
+    frame = pd.DataFrame(moves, columns=prices.columns, index=[
+        f"{prices.index[s].date()} +{days}d" for s in starts
+    ])
+    frame = _fill(frame)
+    weights = np.full(prices.shape[1], 1 / prices.shape[1]) if weights is None else np.asarray(weights)
+    order = np.argsort(frame.to_numpy() @ weights)[:worst]
+    return frame.iloc[order]
+
+
+def betas(returns, market):
+    # OLS slope of every asset on the market in one least squares solve
+    joined = pd.concat([returns, market.rename(MARKET)], axis=1, join="inner").dropna()
+    x = joined[MARKET].to_numpy()
+    X = np.column_stack([np.ones(len(x)), x])
+    coef, *_ = np.linalg.lstsq(X, joined[returns.columns].to_numpy(), rcond=None)
+    return pd.Series(coef[1], index=returns.columns)
+
+
+def factor_moves(beta, sectors, shocks=FACTOR_SHOCKS):
+    # scenarios x assets: market shock times beta plus the asset's sector shock
+    sectors = pd.Series(sectors, index=beta.index)
+    rows = {}
+    for name, shock in shocks.items():
+        sector_moves = sectors.map(shock.get("sectors", {})).fillna(0.0)
+        rows[name] = beta * shock.get("market", 0.0) + sector_moves
+    return pd.DataFrame(rows).T
+
+
+def evaluate(moves, values):
+    # profit and loss of the book under every scenario at once: one (scenarios x assets)
+    # by (assets,) product, plus the holding that hurts most in each
+    moves = moves.reindex(columns=values.index)
+    contributions = moves.to_numpy() * values.to_numpy()
+    pnl = contributions.sum(axis=1)
+    worst = np.argmin(contributions, axis=1)
+    return pd.DataFrame({
+        "pnl": pnl,
+        "return": pnl / values.sum(),
+        "worst_holding": values.index[worst],
+        "worst_holding_pnl": contributions[np.arange(len(worst)), worst],
+    }, index=moves.index).sort_values("pnl")
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import sp500
+import store
+from paths import data_path
+
+# length of the return windows that get compared, and how far apart indexed windows start
+WINDOW = 40
+STRIDE = 5
+
+
+def _normalize(windows):
+    # z-score each window and scale to unit length, a dot product is then the correlation
+    windows = windows - windows.mean(axis=-1, keepdims=True)
+    norms = np.linalg.norm(windows, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (windows / norms).astype(np.float32)
+
+
+def _returns(symbol, refresh=False):
+    close = store.load(symbol, columns=["Close"], refresh=refresh)["Close"]
+    return close.pct_change().dropna()
+
+
+class Index:
+    # One row per (symbol, window end date), stored as a float32 matrix that is
+    # memory mapped on load. Updates only add windows ending after the last one
+    # indexed for each symbol, so the nightly refresh is proportional to new bars.
+    def __init__(self, window=WINDOW, stride=STRIDE):
+        self.window = window
+        self.stride = stride
+        self.vectors = np.zeros((0, window), dtype=np.float32)
+        self.meta = pd.DataFrame({"symbol": pd.Series(dtype=str), "end": pd.Series(dtype="datetime64[ns]")})
+        self.last_end = {}
+        self._load()
+
+    def _path(self, name):
+        return data_path("similarity", f"w{self.window}-s{self.stride}", name)
+
+    def _load(self):
+        if not os.path.exists(self._path("state.json")):
+            return
+        self.vectors = np.load(self._path("vectors.npy"), mmap_mode="r")
+        self.meta = pd.read_parquet(self._path("meta.parquet"))
+        with open(self._path("state.json")) as f:
+            self.last_end = {s: pd.Timestamp(t) for s, t in json.load(f).items()}
+
+    def _swap(self, name, write, mode="wb"):
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+
+    def save(self):
+        self._swap("vectors.npy", lambda f: np.save(f, np.asarray(self.vectors)))
+        self._swap("meta.parquet", lambda f: self.meta.to_parquet(f, index=False))
+        # state goes last, readers reload once it changes
+        state = {s: str(t) for s, t in self.last_end.items()}
+        self._swap("state.json", lambda f: json.dump(state, f), mode="w")
+
+    def _new_windows(self, symbol, refresh):
+        returns = _returns(symbol, refresh)
+        if len(returns) < self.window:
+            return None, None
+
+        # window ending at position j covers returns[j - window + 1 : j + 1]; ends are anchored
+        # at the first full window of the history so later updates land on the same grid
+        ends = np.arange(self.window - 1, len(returns), self.stride)
+        last = self.last_end.get(symbol)
+        if last is not None:
+            ends = ends[returns.index[ends] > last]
+        if not len(ends):
+            return None, None
+
+        windows = sliding_window_view(returns.to_numpy(), self.window)[ends - self.window + 1]
+        meta = pd.DataFrame({"symbol": symbol, "end": returns.index[ends]})
+        return _normalize(windows), meta
+
+    def update(self, symbols, refresh=False):
+        vectors, metas = [], []
+        for symbol in symbols:
+            try:
+                new, meta = self._new_windows(symbol, refresh)
+            except Exception:
+                continue
+            if new is None:
+                continue
+            vectors.append(new)
+            metas.append(meta)
+            self.last_end[symbol] = meta["end"].iloc[-1]
+
+        if vectors:
+            self.vectors = np.concatenate([np.asarray(self.vectors), *vectors])
+            self.meta = pd.concat([self.meta, *metas], ignore_index=True)
+        return sum(len(v) for v in vectors)
+
+    def query(self, symbol, k=10, horizon=20, refresh=True):
+        returns = _returns(symbol, refresh)
+        if len(returns) < self.window or not len(self.meta):
+            return pd.DataFrame()
+        target = _normalize(returns.to_numpy()[-self.window:])
+
+        scores = self.vectors @ target
+        # recent windows of any symbol are out: they overlap the query's dates (other
+        # tickers' windows ending today match on the market move alone) and haven't had
+        # `horizon` days yet to show a forward return
+        cutoff = returns.index[-min(max(self.window, horizon + 1), len(returns))]
+        scores[(self.meta["end"] >= cutoff).to_numpy()] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+
+        matches = self.meta.iloc[top].reset_index(drop=True)
+        matches["correlation"] = scores[top]
+        matches["forward_return"] = [
+            self._forward_return(row.symbol, row.end, horizon) for row in matches.itertuples()
+        ]
+        return matches
+
+    def _forward_return(self, symbol, end, horizon):
+        # what happened over the next `horizon` days after the matched window
+        close = store.read(symbol, columns=["Close"])["Close"]
+        after = close[close.index >= end]
+        if len(after) <= horizon:
+            return np.nan
+        return after.iloc[horizon] / after.iloc[0] - 1
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def load(window=WINDOW, stride=STRIDE):
+    # reload when the batch job has written a newer index
+    path = data_path("similarity", f"w{window}-s{stride}", "state.json")
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    with _lock:
+        cached = _indexes.get((window, stride))
+        if cached is None or cached[0] != mtime:
+            cached = _indexes[(window, stride)] = (mtime, Index(window, stride))
+        return cached[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update the sliding window similarity index.")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    parser.add_argument("--stride", type=int, default=STRIDE)
+    parser.add_argument("--refresh", action="store_true", help="fetch new bars into the local store first")
+    parser.add_argument("--symbols", nargs="*", help="index only these symbols instead of the whole S&P 500")
+    args = parser.parse_args()
+
+    index = Index(args.window, args.stride)
+    added = index.update(args.symbols or sp500.get_sp500(), refresh=args.refresh)
+    index.save()
+    print(f"added {added} windows, index holds {len(index.meta)} windows of {args.window} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from io import StringIO
+
+import pandas as pd
+import requests
+
+from paths import data_path
+
+URL = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+COLUMNS = ["Symbol", "Security", "GICS Sector", "GICS Sub-Industry"]
+
+# constituents change a handful of times a year, once a day is plenty
+TTL_SECONDS = 24 * 60 * 60
+# a failed refresh (offline, blocked) is retried this much later, not on every call
+RETRY_SECONDS = 15 * 60
+
+_table = None
+_lock = threading.Lock()
+_refreshing = threading.Lock()
+_last_attempt = 0.0
+
+
+def _path():
+    return data_path("sp500.parquet")
+
+
+def fetch():
+    response = requests.get(URL, headers=HEADERS, timeout=15)
+    response.raise_for_status()
+    table = pd.read_html(StringIO(response.text))[0][COLUMNS]
+
+    path = _path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    table.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return table
+
+
+def _refresh():
+    global _table
+    try:
+        _table = fetch()
+    except Exception:
+        pass  # offline or wikipedia changed, keep the copy on disk
+    finally:
+        _refreshing.release()
+
+
+def _refresh_in_background():
+    # at most one refresh in flight per process, and at most one every RETRY_SECONDS
+    global _last_attempt
+    if not _refreshing.acquire(blocking=False):
+        return
+    if time.time() - _last_attempt < RETRY_SECONDS:
+        _refreshing.release()
+        return
+    _last_attempt = time.time()
+    threading.Thread(target=_refresh, name="sp500-refresh", daemon=True).start()
+
+
+def constituents():
+    global _table
+    path = _path()
+    with _lock:
+        if _table is None and os.path.exists(path):
+            _table = pd.read_parquet(path)
+        if _table is None:
+            # very first start with nothing on disk, this is the only blocking scrape
+            _table = fetch()
+            return _table
+
+    if not os.path.exists(path) or time.time() - os.path.getmtime(path) > TTL_SECONDS:
+        _refresh_in_background()
+    return _table
+
+
+def get_sp500():
+    return constituents()["Symbol"].tolist()
+
+
+def sectors():
+    return constituents().set_index("Symbol")["GICS Sector"]
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import yfinance as yf
+
+from paths import data_path
+
+DEFAULT_START = "2015-01-01"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# seconds a stored file counts as fresh before we ask yahoo for newer bars
+MAX_AGE = {"1d": 60 * 60, "1m": 60}
+
+# yahoo only serves the last few days of 1 minute bars
+INTRADAY_PERIOD = "7d"
+
+# relative move of an already stored close that means yahoo re-adjusted the history
+ADJUSTMENT_TOLERANCE = 1e-4
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+# hive style layout: data/ohlcv/interval=1d/symbol=AAPL/bars.parquet
+def _path(symbol, interval):
+    return data_path("ohlcv", f"interval={interval}", f"symbol={symbol}", "bars.parquet")
+
+
+def _is_fresh(path, interval):
+    if not os.path.exists(path):
+        return False
+    return time.time() - os.path.getmtime(path) < MAX_AGE.get(interval, 0)
+
+
+def _empty(columns=COLUMNS):
+    return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="Date"))
+
+
+def _write(path, frame):
+    # write next to the target and swap it in, readers never see a half written file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pq.write_table(pa.Table.from_pandas(frame), tmp)
+    os.replace(tmp, path)
+
+
+def download(symbol, interval="1d", start=None, period=None):
+    kwargs = {"start": start} if start is not None else {"period": period}
+    data = yf.download(symbol, interval=interval, progress=False, multi_level_index=False, **kwargs)
+    if data.empty:
+        return _empty()
+    data = data[COLUMNS]
+    data.index.name = "Date"
+    return data
+
+
+def _download_all(symbol, interval, start):
+    if interval == "1d":
+        return download(symbol, interval, start=start)
+    return download(symbol, interval, period=INTRADAY_PERIOD)
+
+
+def _rescaled(stored, fresh):
+    # yahoo adjusts the whole history for splits and dividends; compare the first bar
+    # both copies have, only if it's still the same price can the new bars be appended
+    common = fresh.index[0]
+    if common not in stored.index:
+        return False
+    old, new = stored.at[common, "Close"], fresh.at[common, "Close"]
+    return abs(new - old) > ADJUSTMENT_TOLERANCE * abs(old)
+
+
+def read(symbol, interval="1d", columns=None):
+    path = _path(symbol, interval)
+    if not os.path.exists(path):
+        return _empty(columns or COLUMNS)
+    # memory mapped and column pruned, only the requested columns are decoded
+    table = pq.read_table(path, columns=columns, memory_map=True, use_pandas_metadata=True)
+    return table.to_pandas()
+
+
+def update(symbol, interval="1d", start=DEFAULT_START):
+    path = _path(symbol, interval)
+    with _lock(path):
+        if _is_fresh(path, interval):
+            return
+
+        stored = read(symbol, interval)
+        try:
+            if stored.empty:
+                fresh = _download_all(symbol, interval, start)
+            else:
+                # fetch from the bar before the last one: the last may still have been
+                # forming and gets replaced, the one before is a finished bar to compare
+                fresh = download(symbol, interval, start=stored.index[max(len(stored) - 2, 0)])
+                if not fresh.empty and _rescaled(stored, fresh):
+                    # a split or dividend since the last update moved every adjusted
+                    # price, the stored bars are on the old scale, start over
+                    stored = _empty()
+                    fresh = _download_all(symbol, interval, start)
+        except Exception:
+            # offline, keep serving whatever is on disk
+            return
+
+        if fresh.empty:
+            if os.path.exists(path):
+                os.utime(path)
+            return
+
+        if not stored.empty:
+            fresh = pd.concat([stored[stored.index < fresh.index[0]], fresh])
+        _write(path, fresh)
+
+
+def load(symbol, interval="1d", columns=None, start=None, end=None, refresh=True):
+    if refresh:
+        update(symbol, interval)
+    data = read(symbol, interval, columns)
+    if start is not None:
+        data = data[data.index >= pd.Timestamp(start)]
+    if end is not None:
+        data = data[data.index < pd.Timestamp(end)]
+    return data
+
+
+def load_close(symbols, start=None, end=None, refresh=True):
+    symbols = list(symbols)
+    if refresh:
+        # only symbols with stale files hit the network, and those go out together
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(update, symbols))
+    closes = {
+        symbol: load(symbol, columns=["Close"], start=start, end=end, refresh=False)["Close"]
+        for symbol in symbols
+    }
+    return pd.DataFrame(closes)
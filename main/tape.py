@@ -0,0 +1,104 @@
+import threading
+import time
+
+import yfinance as yf
+
+# one screener call per interval for the whole process, no matter how many sessions
+REFRESH_SECONDS = 60
+
+currency = {
+    "USD": "$",
+    "GBP": "£",
+    "EUR": "€",
+    "INR": "₹",
+    "CNY": "¥",
+    "JPY": "¥",
+    "CHF": "CHF",
+    "AED": "د.إ",
+    "SAR": "﷼",
+}
+
+STYLE = """
+<style>
+.ticker {
+  width: 120%;
+  overflow: hidden;
+  white-space: nowrap;
+  box-sizing: border-box;
+}
+.ticker-text {
+  display: inline-block;
+  padding-left: 100%;
+  animation: ticker 39s linear infinite;
+  font-size: 20px;
+  font-family: monospace;
+}
+@keyframes ticker {
+  0%   { transform: translateX(0%); }
+  100% { transform: translateX(-100%); }
+}
+</style>
+"""
+
+
+def render(quotes):
+    # Build the ticker line
+    ticker_items = []
+    for stock in quotes:
+        symbol = stock['symbol']
+        price = stock['regularMarketPrice']
+        change = stock['regularMarketChangePercent']
+        curren = stock['currency']
+        color = "green" if change >= 0 else "red"
+        ticker_items.append(f"<span style='margin-right:40px'>{symbol}: {price:.2f}{currency.get(curren, curren)}<span style='color:{color}'>({change:.2f}%)</span>|</span>")
+
+    ticker_line = " ".join(ticker_items)
+    return f"""{STYLE}
+<div class="ticker">
+  <div class="ticker-text">{ticker_line}</div>
+</div>
+"""
+
+
+class TickerTape:
+    def __init__(self, interval=REFRESH_SECONDS):
+        self.interval = interval
+        self.html = render([])
+        self.updated = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        results = yf.screen('most_actives')
+        # swap the whole string at once, readers get either the old or the new tape
+        self.html = render(results['quotes'][1:150])
+        self.updated = time.time()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                pass  # keep showing the last good tape
+            self._ready.set()
+            time.sleep(self.interval)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ticker-tape", daemon=True)
+                self._thread.start()
+
+    def get(self, timeout=10):
+        self.start()
+        # only the first page view after the process starts can wait here
+        self._ready.wait(timeout)
+        return self.html
+
+
+_tape = TickerTape()
+
+
+def ticker_html():
+    return _tape.get()
@@ -0,0 +1,78 @@
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.preprocessing import StandardScaler
+
+import features
+
+FEATURES = ['Open','High','Low','Close','Volume','MA10','MA50','Volatility']
+
+PARAMS = {
+    "xgb": dict(
+        booster='gbtree',             # Booster type ('gbtree', 'gblinear', or 'dart')
+        n_jobs=4,                     # Parallel threads; -1 uses all cores.
+        random_state=42,              # Random seed for reproducibility.
+        verbosity=1,                  # Output verbosity.
+
+        n_estimators=500,             # Number of boosting rounds.
+        learning_rate=0.05,           # Step size shrinkage.
+        max_depth=5,                  # Maximum tree depth.
+        min_child_weight=1,           # Minimum sum of instance weight in a child node.
+        gamma=0.2,                    # Minimum loss reduction for a split.
+        subsample=0.8,                # Subsample ratio of training instances.
+        colsample_bytree=0.8,         # Subsample ratio of columns per tree.
+        reg_alpha=0.1,                # L1 regularization.
+        reg_lambda=1,                 # L2 regularization.
+
+        objective='reg:squarederror', # Learning objective (e.g., regression with squared loss).
+        eval_metric='rmse'            # Evaluation metric.
+    ),
+    "rf": dict(
+        n_estimators=100,
+        max_depth=5,
+        min_samples_split=2,
+        min_samples_leaf=1,
+        max_features=5,
+        random_state=42,
+        oob_score=True,
+        bootstrap=True,
+        n_jobs=-1
+    ),
+    "knn": dict(
+        n_neighbors=5,
+        weights='uniform',
+        algorithm='auto',
+        leaf_size=30,
+        p=2,
+        metric='minkowski',
+        n_jobs=-1
+    ),
+}
+
+
+def add_features(data):
+    return features.compute(data)
+
+
+def split(data, test_size=0.2):
+    return train_test_split(data[FEATURES], data['Return'], test_size=test_size, random_state=42, shuffle=False)
+
+
+def make_models(params=PARAMS):
+    return {
+        "xgb": xgb.XGBRegressor(**params["xgb"]),
+        "rf": RandomForestRegressor(**params["rf"]),
+        "knn": KNeighborsRegressor(**params["knn"]),
+    }
+
+
+def fit(x_train, y_train, params=PARAMS):
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(x_train)
+
+    bundle = {"scaler": scaler}
+    for name, model in make_models(params).items():
+        model.fit(X_train_scaled, y_train)
+        bundle[name] = model
+    return bundle
@@ -0,0 +1,149 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import root_mean_squared_error
+
+import pools
+import training
+from paths import data_path
+
+XGB_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": [0.01, 0.03, 0.05, 0.1],
+    "min_child_weight": [1, 3, 5, 10],
+    "gamma": [0.0, 0.1, 0.2, 0.5],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "reg_alpha": [0.0, 0.1, 1.0],
+    "reg_lambda": [1, 5, 10],
+}
+
+RF_SPACE = {
+    "max_depth": [3, 5, 8, 12, None],
+    "max_features": [2, 3, 5, 8],
+    "min_samples_leaf": [1, 5, 10, 20],
+    "min_samples_split": [2, 5, 10],
+}
+
+# successive halving: start many configs on a small budget, keep the best 1/ETA,
+# give the survivors ETA times the budget, until one is left
+N_CANDIDATES = 27
+ETA = 3
+XGB_ROUNDS = (50, 1000)
+RF_TREES = (25, 300)
+EARLY_STOPPING = 25
+
+# last part of the training window, in time order, used to rank configs
+VALIDATION_SIZE = 0.2
+
+_X_train = _y_train = _X_val = _y_val = None
+
+
+def _init(X_train, y_train, X_val, y_val):
+    global _X_train, _y_train, _X_val, _y_val
+    _X_train, _y_train, _X_val, _y_val = X_train, y_train, X_val, y_val
+
+
+def _score(task):
+    kind, params, budget = task
+    if kind == "xgb":
+        model = xgb.XGBRegressor(**{
+            **training.PARAMS["xgb"], **params,
+            "n_estimators": budget,
+            "early_stopping_rounds": EARLY_STOPPING,
+            "n_jobs": 1,
+            "verbosity": 0,
+        })
+        model.fit(_X_train, _y_train, eval_set=[(_X_val, _y_val)], verbose=False)
+        # rounds after the best one are wasted, the final model is trained with exactly this many
+        rounds = model.best_iteration + 1
+    else:
+        model = RandomForestRegressor(**{
+            **training.PARAMS["rf"], **params,
+            "n_estimators": budget,
+            "oob_score": False,
+            "n_jobs": 1,
+        })
+        model.fit(_X_train, _y_train)
+        rounds = budget
+    return root_mean_squared_error(_y_val, model.predict(_X_val)), rounds
+
+
+def _sample(space, n, rng):
+    return [
+        {name: values[rng.integers(len(values))] for name, values in space.items()}
+        for _ in range(n)
+    ]
+
+
+def successive_halving(pool, kind, space, resource, n_candidates=N_CANDIDATES, seed=42):
+    rng = np.random.default_rng(seed)
+    candidates = _sample(space, n_candidates, rng)
+    budget, max_budget = resource
+    history = []
+
+    while True:
+        scores = list(pool.map(_score, [(kind, c, budget) for c in candidates]))
+        ranked = sorted(zip(scores, candidates), key=lambda pair: pair[0][0])
+        history.append({"budget": budget, "configs": len(candidates), "best_rmse": ranked[0][0][0]})
+        if len(candidates) == 1:
+            break
+        candidates = [c for _, c in ranked[:max(1, len(candidates) // ETA)]]
+        budget = min(budget * ETA, max_budget)
+
+    (rmse, rounds), best = ranked[0]
+    return {**best, "n_estimators": int(rounds)}, rmse, history
+
+
+def tune(ticker, data, workers=None, n_candidates=N_CANDIDATES):
+    # only the training part of the page's split is used, the test block stays unseen
+    x_train, _, y_train, _ = training.split(data)
+    cut = int(len(x_train) * (1 - VALIDATION_SIZE))
+    X = x_train.to_numpy()
+    y = y_train.to_numpy()
+    initargs = (X[:cut], y[:cut], X[cut:], y[cut:])
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=pools.context(), initializer=_init, initargs=initargs) as pool:
+        xgb_best, xgb_rmse, xgb_history = successive_halving(pool, "xgb", XGB_SPACE, XGB_ROUNDS, n_candidates)
+        rf_best, rf_rmse, rf_history = successive_halving(pool, "rf", RF_SPACE, RF_TREES, n_candidates)
+
+    result = {
+        "ticker": ticker,
+        "last_bar": str(data.index[-1].date()),
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": round(time.time() - started, 1),
+        "xgb": xgb_best,
+        "rf": rf_best,
+        "validation_rmse": {"xgb": xgb_rmse, "rf": rf_rmse},
+        "history": {"xgb": xgb_history, "rf": rf_history},
+    }
+    path = data_path("tuning", f"{ticker}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, default=float)
+    return result
+
+
+def load(ticker):
+    path = data_path("tuning", f"{ticker}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def best_params(ticker):
+    # the page's defaults with the winning configuration for this ticker on top
+    tuned = load(ticker)
+    if tuned is None:
+        return training.PARAMS
+    return {
+        **training.PARAMS,
+        "xgb": {**training.PARAMS["xgb"], **tuned["xgb"]},
+        "rf": {**training.PARAMS["rf"], **tuned["rf"]},
+    }